@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: pairing product links with prices on a search results page.
+
+Compares the original per-link extraction (climb up to five ancestors and run
+select_one('p.product-main-price') at each level) with the single-pass
+extract_product_cards() in cex_pricing/parsing.py, over a saved search page.
+First checks that lookups, which parse only the results region unless it
+yields no priced card, find the same cards as parsing the whole page -
+including on a page whose priceless recommendation links sit outside any
+card, and one whose card wrappers have no result/product class.
+
+    python benchmarks/bench_card_extraction.py [--scale 1 5 20] [--repeat 20]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cex_pricing.fetch import search_page_cards  # noqa: E402
+from cex_pricing.parsing import ProductCard, extract_product_cards, parse_html  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+FIXTURE = os.path.join(FIXTURES, 'search_iphone_14.html')
+# Pages on which lookups must find exactly the cards of the full parse
+REGION_FIXTURES = ['search_iphone_14.html', 'search_recommendations.html', 'search_unmarked_cards.html']
+LIST_START = '<div class="search-results-list">'
+LIST_END = '\n        </div>\n      </section>'
+
+
+def legacy_extract_product_cards(soup, product_links):
+    """The extraction loop as it was before the single-pass rewrite."""
+    cards = []
+    for link in product_links:
+        title = link.get_text(strip=True)
+        if not title or len(title) < 3:
+            continue
+        href = link.get("href")
+        if not href:
+            continue
+        url = "https://uk.webuy.com" + href if href.startswith('/') else href
+
+        parent_container = link.parent
+        max_levels = 5
+        current_level = 0
+        while parent_container and parent_container.name != 'body' and current_level < max_levels:
+            price_elem = parent_container.select_one('p.product-main-price')
+            if price_elem:
+                price_text = price_elem.get_text(strip=True)
+                cards.append(ProductCard(title, re.sub(r'[^\d.]', '', price_text), url))
+                break
+            parent_container = parent_container.parent
+            current_level += 1
+    return cards
+
+
+def scaled_page(page, scale):
+    """Repeat the result cards `scale` times to mimic bigger result pages."""
+    start = page.index(LIST_START) + len(LIST_START)
+    end = page.index(LIST_END, start)
+    return page[:start] + page[start:end] * scale + page[end:]
+
+
+def region_mismatches():
+    """Fixtures where lookups find different cards to the full parse."""
+    mismatches = []
+    for name in REGION_FIXTURES:
+        with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+            page = f.read()
+        soup = parse_html(page)
+        full = extract_product_cards(soup, soup.select('a[href*="/product-detail"]'))
+        _, _, region = search_page_cards(page)
+        if full != region:
+            mismatches.append((name, len(full), len(region)))
+    return mismatches
+
+
+def bench(func, soup, links, repeat):
+    """Best time per call in milliseconds."""
+    timer = timeit.Timer(lambda: func(soup, links))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 5, 20],
+                        help='Multiples of the saved page\'s result cards to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repeats (best is reported)')
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding='utf-8') as f:
+        page = f.read()
+
+    print("🚀 Card extraction benchmark")
+    print("=" * 40)
+    for name, full, region in region_mismatches():
+        print(f"❌ {name}: the lookup found {region} cards, the full parse {full}")
+        return 1
+    print(f"{'cards':>7} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for scale in args.scale:
+        soup = BeautifulSoup(scaled_page(page, scale), 'html.parser')
+        links = soup.select('a[href*="/product-detail"]')
+
+        before = legacy_extract_product_cards(soup, links)
+        after = extract_product_cards(soup, links)
+        if before != after:
+            print(f"❌ Results differ at scale {scale}: {len(before)} vs {len(after)} cards")
+            return 1
+
+        before_ms = bench(legacy_extract_product_cards, soup, links, args.repeat)
+        after_ms = bench(extract_product_cards, soup, links, args.repeat)
+        print(f"{len(after):>7} {before_ms:>12.2f} {after_ms:>11.2f} {before_ms / after_ms:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: reading search results from the state a page embeds in its scripts.
+
+Compares the original Strategy B (parse the whole page, then json.loads every
+script mentioning products between its first '{' and last '}' and walk the
+whole object tree) with extract_embedded_cards() in cex_pricing/parsing.py,
+which reads the known state blob straight from the markup. The saved Nuxt
+page is padded with an inline script bundle of the given size, as real pages
+carry, and its results are repeated to mimic bigger result pages.
+
+    python benchmarks/bench_embedded_data.py [--bundle-kb 0 500 2000] [--scale 1 20] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cex_pricing.parsing import ProductCard, _absolute_url, extract_embedded_cards, parse_html  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, 'benchmarks', 'fixtures', 'search_nintendo_switch_nuxt.html')
+STATE_PREFIX = '<script>window.__NUXT__='
+# Minified-looking script that mentions products but holds no results, like an analytics bundle
+BUNDLE_CHUNK = 'function t(e){return e.product&&{id:e.product.id,items:[e.sku,e.price]}}var n={a:1,b:[2,3]};'
+
+
+def legacy_embedded_cards(markup):
+    """Strategy B as it was before extract_embedded_cards()."""
+    soup = parse_html(markup)
+    cards = []
+    for sc in soup.find_all('script'):
+        text = sc.get_text(strip=True)
+        if not text or len(text) < 100:
+            continue
+        if 'product' in text.lower() or 'items' in text.lower() or 'results' in text.lower():
+            try:
+                start = text.find('{')
+                end = text.rfind('}')
+                if start != -1 and end != -1 and end > start:
+                    obj = json.loads(text[start:end+1])
+                    candidates = []
+                    def walk(o):
+                        if isinstance(o, dict):
+                            for k, v in o.items():
+                                if isinstance(v, (list, dict)):
+                                    walk(v)
+                        elif isinstance(o, list):
+                            if len(o) > 0 and isinstance(o[0], dict) and any('price' in (k.lower()) for k in o[0].keys()):
+                                candidates.append(o)
+                            else:
+                                for item in o:
+                                    walk(item)
+                    walk(obj)
+                    if candidates:
+                        for arr in candidates:
+                            for it in arr:
+                                title = it.get('title') or it.get('name') or ''
+                                url = it.get('url') or it.get('href') or ''
+                                price = it.get('price') or it.get('sellPrice') or it.get('weSellFor')
+                                if title and url and price:
+                                    cards.append(ProductCard(title, re.sub(r'[^\d.]', '', str(price)), _absolute_url(url)))
+                        if cards:
+                            break
+            except Exception:
+                continue
+    return cards
+
+
+def padded_page(page, bundle_kb, scale):
+    """The saved page with an inline script bundle ahead of its state and its results repeated."""
+    start = page.index(STATE_PREFIX) + len(STATE_PREFIX)
+    state, end = json.JSONDecoder().raw_decode(page, start)
+    state['state']['search']['results'] *= scale
+    bundle = BUNDLE_CHUNK * (bundle_kb * 1024 // len(BUNDLE_CHUNK))
+    script = f'<script>{bundle}</script>\n  ' if bundle else ''
+    return page[:start - len(STATE_PREFIX)] + script + STATE_PREFIX + json.dumps(state) + page[end:]
+
+
+def bench(func, markup, repeat):
+    """Best time per call in milliseconds."""
+    timer = timeit.Timer(lambda: func(markup))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bundle-kb', type=int, nargs='+', default=[0, 500, 2000],
+                        help='Size of the inline script bundle added to the page')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 20],
+                        help='Multiples of the saved page\'s results to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repeats (best is reported)')
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding='utf-8') as f:
+        page = f.read()
+
+    print("🚀 Embedded data extraction benchmark")
+    print("=" * 40)
+    print(f"{'bundle KB':>9} {'cards':>6} {'before (ms)':>12} {'after (ms)':>11} {'speedup':>8}")
+    for bundle_kb in args.bundle_kb:
+        for scale in args.scale:
+            markup = padded_page(page, bundle_kb, scale)
+            before = legacy_embedded_cards(markup)
+            after = extract_embedded_cards(markup)
+            if before != after:
+                print(f"❌ Results differ with a {bundle_kb} KB bundle at scale {scale}: "
+                      f"{len(before)} vs {len(after)} cards")
+                return 1
+
+            before_ms = bench(legacy_embedded_cards, markup, args.repeat)
+            after_ms = bench(extract_embedded_cards, markup, args.repeat)
+            print(f"{bundle_kb:>9} {len(after):>6} {before_ms:>12.2f} {after_ms:>11.2f} {before_ms / after_ms:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
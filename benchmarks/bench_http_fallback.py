@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the plain-HTTP fallback against a local stub of the CeX search page.
+
+Compares the original fallback (one bare requests.get() per product, one
+after another) with fetch_cex_prices_fallback() in cex_pricing/fallback.py,
+which searches concurrently over pooled connections and retries throttled
+requests. The stub adds a fixed latency to every response and answers the
+first request for every `--throttle-every`th product with a 429.
+
+    python benchmarks/bench_http_fallback.py [--products 100] [--latency-ms 50] [--concurrency 8]
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The stub is local, so skip the politeness delay and keep retry backoff short
+os.environ.setdefault('CEX_REQUESTS_PER_SECOND', '0')
+os.environ.setdefault('CEX_FALLBACK_BACKOFF_SECONDS', '0.05')
+
+from cex_pricing.fallback import fetch_cex_prices_fallback  # noqa: E402
+
+
+def make_stub(latency, throttle_every):
+    """Search page handler: prices each 'Product N' at £N.00 after `latency` seconds."""
+    seen = set()
+    lock = threading.Lock()
+
+    class SearchStub(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # Keep-alive responses otherwise stall on delayed ACKs
+
+        def do_GET(self):
+            term = parse_qs(urlparse(self.path).query).get('stext', [''])[0]
+            number = int(re.sub(r'\D', '', term) or 0)
+            with lock:
+                first = term not in seen
+                seen.add(term)
+            time.sleep(latency)
+            if first and throttle_every and number % throttle_every == 0:
+                self._send(429, b'slow down')
+            else:
+                self._send(200, f'<p class="product-main-price">£{number}.00</p>'.encode())
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return SearchStub
+
+def legacy_fallback(product_name, search_url):
+    """The fallback as it was: a fresh connection per product and no retries."""
+    try:
+        url = f"{search_url}?stext={requests.utils.quote(product_name.strip())}"
+        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10)
+        if response.status_code == 200:
+            prices = re.findall(r'£[\d,]+(?:\.\d{2})?', response.text)
+            if prices:
+                return "Search results found (fallback mode)", prices[0].replace('£', ''), url
+            return "No prices found in fallback mode", None, url
+        return None, None, None
+    except Exception:
+        return None, None, None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100, help='Products to search for')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Stub response latency')
+    parser.add_argument('--throttle-every', type=int, default=10,
+                        help='Answer the first request for every Nth product with a 429 (0 disables)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Searches in flight at once')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_stub(args.latency_ms / 1000, args.throttle_every))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    search_url = f"http://127.0.0.1:{server.server_port}/search"
+    names = [f"Product {i}" for i in range(1, args.products + 1)]
+    expected = [f"{i}.00" for i in range(1, args.products + 1)]
+
+    print("🚀 HTTP fallback benchmark")
+    print("=" * 40)
+    start = time.perf_counter()
+    before = [legacy_fallback(name, search_url) for name in names]
+    before_s = time.perf_counter() - start
+
+    server.RequestHandlerClass = make_stub(args.latency_ms / 1000, args.throttle_every)  # Fresh 429s
+    start = time.perf_counter()
+    after = fetch_cex_prices_fallback(names, concurrency=args.concurrency, search_url=search_url)
+    after_s = time.perf_counter() - start
+    server.shutdown()
+
+    if [price for _, price, _ in after] != expected:
+        print("❌ Async fallback results are missing or out of order")
+        return 1
+    before_ok = sum(price == want for (_, price, _), want in zip(before, expected))
+    print(f"{'':>8} {'seconds':>8} {'per sec':>8} {'priced':>8}")
+    print(f"{'before':>8} {before_s:>8.2f} {len(names) / before_s:>8.1f} {before_ok:>8}")
+    print(f"{'after':>8} {after_s:>8.2f} {len(names) / after_s:>8.1f} {len(names):>8}")
+    print(f"Speedup: {before_s / after_s:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end lookups against recorded CeX pages, for speed and accuracy.
+
+Runs every labelled case in benchmarks/fixtures/cases.json through the lookup
+paths, with the pages and API responses served by the local replay server:
+
+  browser  search_cex_with_driver() with a stand-in driver that loads pages
+           from the replay server, so navigation, parsing, Strategy A/B and
+           the fallback selectors, extraction and matching all run
+  api      fetch_cex_price_api() against the replayed JSON search API
+  catalogue  Catalogue.lookup() on a snapshot harvested from the replayed API
+             (a lookup it can't answer counts as no match)
+
+and reports lookups/sec, p50/p95 per stage and match accuracy against the
+labels. A case is correct when the matched title is one of its expected
+titles, or nothing is matched when none is expected.
+
+    python benchmarks/bench_pipeline.py [--repeat 5] [--path browser api catalogue] [--min-accuracy 0.94]
+"""
+
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Replayed pages are local, so skip the politeness delay
+os.environ.setdefault('CEX_REQUESTS_PER_SECOND', '0')
+
+from cex_pricing.catalogue import Catalogue  # noqa: E402
+from cex_pricing.fetch import fetch_cex_price_api, search_cex_with_driver  # noqa: E402
+from cex_pricing.metrics import get_metrics, lookup_trace  # noqa: E402
+from replay import ReplayServer, load_cases  # noqa: E402
+
+
+class ReplayDriver:
+    """Stands in for a browser, loading pages from the replay server instead of CeX."""
+
+    def __init__(self, base_url, session):
+        self.base_url = base_url
+        self.session = session
+        self.page_source = ''
+
+    def get(self, url):
+        parsed = urlparse(url)
+        self.page_source = self.session.get(f"{self.base_url}{parsed.path}?{parsed.query}", timeout=10).text
+
+    def set_page_load_timeout(self, seconds):
+        pass  # Recorded pages load from localhost
+
+    def execute_script(self, script, *args):
+        if 'getEntriesByType' in script:
+            return [1, len(self.page_source.encode())]  # Page weight: just the recorded HTML
+        return 'indicator:replay'  # The recorded page is complete as soon as it loads
+
+    def find_elements(self, *args):
+        return []  # Nothing to click through on a recorded page
+
+def lookup_paths(server, cases):
+    session = requests.Session()
+    driver = ReplayDriver(server.base_url, session)
+    catalogue = Catalogue(':memory:')
+    catalogue.harvest([case['query'] for case in cases], session=session, api_url=server.api_url)
+    return {
+        'browser': lambda name: search_cex_with_driver(driver, name),
+        'api': lambda name: fetch_cex_price_api(name, session=session, api_url=server.api_url),
+        'catalogue': lambda name: catalogue.lookup(name) or (None, None, None)
+    }
+
+def is_correct(case, result):
+    return result[0] in case['expected'] if case['expected'] else result[0] is None
+
+def run_path(lookup, cases, repeat):
+    """Run every case `repeat` times through one lookup path."""
+    metrics = get_metrics()
+    metrics.reset()
+    results = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            with lookup_trace(case['query']) as trace:
+                result = trace['result'] = lookup(case['query'])
+            results.append(result)
+    seconds = time.perf_counter() - started
+    first_pass = results[:len(cases)]
+    return {
+        'lookups': len(results),
+        'seconds': seconds,
+        'correct': sum(is_correct(case, result) for case, result in zip(cases, first_pass)),
+        'misses': [(case, result) for case, result in zip(cases, first_pass) if not is_correct(case, result)],
+        'stages': metrics.summary(),
+        'page_weight': metrics.page_weight_summary()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Passes over the recorded cases')
+    parser.add_argument('--path', nargs='+', choices=['browser', 'api', 'catalogue'],
+                        default=['browser', 'api', 'catalogue'],
+                        help='Lookup paths to benchmark')
+    # 16 of the 17 cases match on every path (the DualSense abbreviation is a known miss), so a
+    # wrong-variant match such as "iPhone 14 1TB" -> "iPhone 14 Pro 1TB" fails the run
+    parser.add_argument('--min-accuracy', type=float, default=0.94,
+                        help='Exit with an error if any path matches fewer cases correctly than this fraction')
+    args = parser.parse_args()
+
+    cases = load_cases()
+    with ReplayServer(cases) as server:
+        paths = lookup_paths(server, cases)
+        reports = {name: run_path(paths[name], cases, args.repeat) for name in args.path}
+
+    print("🚀 Lookup pipeline benchmark")
+    print("=" * 40)
+    print(f"{len(cases)} recorded cases x {args.repeat} passes")
+    print(f"{'path':>9} {'lookups':>8} {'seconds':>8} {'per sec':>8} {'accuracy':>9}")
+    for name, report in reports.items():
+        accuracy = report['correct'] / len(cases)
+        print(f"{name:>9} {report['lookups']:>8} {report['seconds']:>8.2f} "
+              f"{report['lookups'] / report['seconds']:>8.1f} {accuracy:>8.0%}")
+
+    for name, report in reports.items():
+        print(f"\n⏱️  {name} stages (ms)")
+        print(f"{'stage':>16} {'count':>6} {'p50':>8} {'p95':>8}")
+        for stage, row in report['stages'].items():
+            print(f"{stage:>16} {row['count']:>6} {row['p50'] * 1000:>8.2f} {row['p95'] * 1000:>8.2f}")
+        if report['page_weight']:
+            page_bytes = report['page_weight']['page_bytes']
+            print(f"{'page KB':>16} {page_bytes['count']:>6} {page_bytes['p50'] / 1024:>8.1f} {page_bytes['p95'] / 1024:>8.1f}")
+
+    failed = False
+    for name, report in reports.items():
+        for case, result in report['misses']:
+            expected = case['expected'][0] if case['expected'] else None
+            more = f" (or {len(case['expected']) - 1} more)" if len(case['expected']) > 1 else ''
+            print(f"❌ {name}: {case['query']!r} matched {result[0]!r}, expected {expected!r}{more}")
+        if report['correct'] / len(cases) < args.min_accuracy:
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark: collecting and summarising a large job's results.
+
+Compares the row-wise path a PricingJob used before ResultTable (every row
+written to a full and a matches-only CSV as it is priced, the CSV parsed
+back into a DataFrame for the page, and statistics worked out row by row
+from the records) with cex_pricing/table.py (rows appended to typed columns,
+one DataFrame built at the end, summarised with vectorized operations and
+both CSVs cut from a single serialisation of it).
+Both produce the same CSVs and the same summary; time and peak traced memory
+are reported for each.
+
+    python benchmarks/bench_results.py [--rows 10000 100000] [--repeat 3]
+"""
+
+import argparse
+import io
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from cex_pricing.batch import ResultCsvWriter  # noqa: E402
+from cex_pricing.results import BUDGET_EXCEEDED, MATCHED, NO_MATCH, LookupResult  # noqa: E402
+from cex_pricing.table import ResultTable, export_csvs, summarize  # noqa: E402
+
+COLUMNS = ['Product Name', 'Qty', 'Category']
+CATEGORIES = ['Phones', 'Consoles', 'Games', 'Laptops', 'Tablets', 'Cameras', 'Audio', 'Watches']
+PRICE_COLUMN = 'CeX Sell Price (GBP)'
+
+
+def priced_rows(count, seed=1):
+    """(row, result) pairs like a job yields: mostly matches, some misses and a few timeouts."""
+    rng = random.Random(seed)
+    for i in range(count):
+        row = {'Product Name': f'Product {i % 5000} 128GB', 'Qty': str(rng.randint(1, 3)),
+               'Category': rng.choice(CATEGORIES)}
+        roll = rng.random()
+        if roll < 0.7:
+            result = LookupResult(f'CeX product {i % 5000}', f'{rng.uniform(1, 900):.2f}',
+                                  f'https://uk.webuy.com/product-detail?id={i % 5000}', score=0.8, strategy='api')
+        elif roll < 0.97:
+            result = LookupResult.failed(NO_MATCH, strategy='api')
+        else:
+            result = LookupResult.failed(BUDGET_EXCEEDED, 'ready_timeout')
+        yield row, result
+
+
+def legacy_results(rows):
+    """Row-wise: stream both CSVs, parse the full one back, then loop over the records for statistics."""
+    full, matches = io.StringIO(), io.StringIO()
+    writer = ResultCsvWriter(full, matches, COLUMNS)
+    for row, result in rows:
+        writer.write(row, result)
+    full_csv, matches_csv = full.getvalue().encode('utf-8'), matches.getvalue().encode('utf-8')
+    frame = pd.read_csv(io.BytesIO(full_csv))  # What the page showed
+    records = frame.to_dict('records')
+    prices = sorted(float(r[PRICE_COLUMN]) for r in records
+                    if r['Lookup Status'] == MATCHED and not math.isnan(float(r[PRICE_COLUMN])))
+    statuses, categories = {}, {}
+    for r in records:
+        statuses[r['Lookup Status']] = statuses.get(r['Lookup Status'], 0) + 1
+        group = categories.setdefault(r['Category'], [0, 0, 0.0])
+        group[0] += 1
+        if r['Lookup Status'] == MATCHED:
+            group[1] += 1
+            group[2] += float(r[PRICE_COLUMN])
+    summary = {
+        'rows': len(records),
+        'matched': len(prices),
+        'total_value': sum(prices),
+        'median': statistics.median(prices),
+        'statuses': statuses,
+        'categories': categories
+    }
+    return summary, full_csv, matches_csv
+
+
+def table_results(rows):
+    """Column-wise: append to a ResultTable, build one typed DataFrame, summarise and export it."""
+    table = ResultTable(COLUMNS)
+    for row, result in rows:
+        table.append(row, result)
+    frame = table.to_frame()
+    stats = summarize(frame, 'Category')
+    summary = {
+        'rows': stats['rows'],
+        'matched': stats['matched'],
+        'total_value': stats['total_value'],
+        'median': stats['prices']['p50'],
+        'statuses': stats['statuses'],
+        'categories': stats['categories']
+    }
+    return (summary, *export_csvs(frame))
+
+
+def measure(func, rows, repeat):
+    """Best seconds over `repeat` runs, then the peak memory traced during one more run, in MB."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(iter(rows))
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    output = func(iter(rows))
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return best, peak, output
+
+
+def same_summary(before, after):
+    """Whether the two paths agree on counts, totals and the per-category split."""
+    categories = {row['Category']: (row['rows'], row['matched'], row['total_value'])
+                  for row in after['categories'].to_dict('records')}
+    return (before['rows'] == after['rows'] and before['matched'] == after['matched']
+            and math.isclose(before['total_value'], after['total_value'], rel_tol=1e-9)
+            and math.isclose(before['median'], after['median'], rel_tol=1e-9)
+            and before['statuses'] == after['statuses']
+            and all(categories[name][:2] == tuple(group[:2]) and math.isclose(categories[name][2], group[2])
+                    for name, group in before['categories'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='Result set sizes to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repeats (best is reported)')
+    args = parser.parse_args()
+
+    print("🚀 Result post-processing benchmark")
+    print("=" * 40)
+    print(f"{'rows':>7} {'before (s)':>11} {'after (s)':>10} {'speedup':>8} {'before MB':>10} {'after MB':>9}")
+    for count in args.rows:
+        rows = list(priced_rows(count))  # Made up front, so only the post-processing is measured
+        before_s, before_mb, (before, before_csv, before_matches) = measure(legacy_results, rows, args.repeat)
+        after_s, after_mb, (after, after_csv, after_matches) = measure(table_results, rows, args.repeat)
+        if not same_summary(before, after):
+            print(f"❌ Summaries differ for {count} rows")
+            return 1
+        if before_csv.count(b'\n') != after_csv.count(b'\n') or before_matches.count(b'\n') != after_matches.count(b'\n'):
+            print(f"❌ CSV exports differ in length for {count} rows")
+            return 1
+        print(f"{count:>7} {before_s:>11.2f} {after_s:>10.2f} {before_s / after_s:>7.1f}x "
+              f"{before_mb:>10.1f} {after_mb:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Local replay server for the recorded CeX fixtures.
+
+Serves each labelled case in fixtures/cases.json: its search page at
+/search?stext=<query> and its JSON API response at /v3/boxes?q=<query>.
+Queries are matched the way the app normalizes them; anything unknown gets
+the no-results page and an empty box list.
+
+    python benchmarks/replay.py [--port 8765] [--latency-ms 0]
+
+or, from a benchmark:
+
+    with ReplayServer() as server:
+        fetch_cex_price_api("iPhone 14 128GB", api_url=server.api_url)
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cex_pricing.matching import clean_search_term, normalize_query  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+NO_RESULTS_PAGE = 'search_no_results.html'
+NO_RESULTS_API = 'api_no_results.json'
+
+
+def load_cases():
+    """The labelled lookups in fixtures/cases.json."""
+    with open(os.path.join(FIXTURES, 'cases.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+def _read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+class ReplayServer:
+    """Serve recorded search pages and API responses from a background thread."""
+
+    def __init__(self, cases=None, port=0, latency=0.0):
+        routes = {}  # normalized query -> (page fixture, api fixture)
+        for case in cases if cases is not None else load_cases():
+            # The app searches for clean_search_term(), so route on what it will send
+            routes[normalize_query(clean_search_term(case['query']))] = (case['page'], case['api'])
+        bodies = {name: _read_fixture(name) for pair in routes.values() for name in pair}
+        bodies[NO_RESULTS_PAGE] = _read_fixture(NO_RESULTS_PAGE)
+        bodies[NO_RESULTS_API] = _read_fixture(NO_RESULTS_API)
+        self.requests = 0
+
+        server = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # Keep-alive responses otherwise stall on delayed ACKs
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                server.requests += 1
+                if latency:
+                    time.sleep(latency)
+                if url.path == '/search':
+                    query = normalize_query(params.get('stext', [''])[0])
+                    page, _ = routes.get(query, (NO_RESULTS_PAGE, None))
+                    self._send(200, 'text/html; charset=utf-8', bodies[page])
+                elif url.path == '/v3/boxes':
+                    query = normalize_query(params.get('q', [''])[0])
+                    _, api = routes.get(query, (None, NO_RESULTS_API))
+                    self._send(200, 'application/json', bodies[api])
+                else:
+                    self._send(404, 'text/plain', b'not recorded')
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), ReplayHandler)
+        self._httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_port}"
+        self.search_url = self.base_url + '/search'
+        self.api_url = self.base_url + '/v3/boxes'
+
+    def start(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response')
+    args = parser.parse_args()
+
+    server = ReplayServer(port=args.port, latency=args.latency_ms / 1000)
+    print(f"Replaying {len(load_cases())} recorded searches")
+    print(f"  CEX_API_URL={server.api_url}")
+    print(f"  CEX_SEARCH_URL={server.search_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""CeX sell-price lookups, usable without the Streamlit app.
+
+    from cex_pricing import fetch_cex_price
+    match, price, url = fetch_cex_price("iPhone 14 128GB")
+"""
+
+from .batch import (
+    NAME_COLUMN,
+    RESULT_COLUMNS,
+    ResultCsvWriter,
+    fetch_cex_prices,
+    plan_queries,
+    price_rows,
+    result_columns
+)
+from .background import JobQueue, PricingJob
+from .browser import SELENIUM_AVAILABLE, SELENIUM_IMPORT_ERROR
+from .cache import PriceCache, get_price_cache
+from .catalogue import Catalogue, get_catalogue
+from .fallback import fetch_cex_prices_fallback
+from .fetch import fetch_cex_price, lookup_cex_price
+from .jobs import JobCheckpoint, file_job_id, job_id_for
+from .matching import normalize_query
+from .metrics import LookupMetrics, get_metrics
+from .net import AdaptiveRateLimiter, get_rate_limiter
+from .results import LookupResult, lookup_status
+from .table import (
+    ARROW_AVAILABLE,
+    ResultTable,
+    category_breakdown,
+    export_results,
+    guess_category_column,
+    summarize
+)
+
+__all__ = [
+    'ARROW_AVAILABLE',
+    'AdaptiveRateLimiter',
+    'Catalogue',
+    'NAME_COLUMN',
+    'RESULT_COLUMNS',
+    'SELENIUM_AVAILABLE',
+    'SELENIUM_IMPORT_ERROR',
+    'JobCheckpoint',
+    'JobQueue',
+    'LookupMetrics',
+    'LookupResult',
+    'PriceCache',
+    'PricingJob',
+    'ResultCsvWriter',
+    'ResultTable',
+    'category_breakdown',
+    'export_results',
+    'fetch_cex_price',
+    'fetch_cex_prices',
+    'fetch_cex_prices_fallback',
+    'file_job_id',
+    'get_catalogue',
+    'get_metrics',
+    'get_price_cache',
+    'get_rate_limiter',
+    'guess_category_column',
+    'job_id_for',
+    'lookup_cex_price',
+    'lookup_status',
+    'normalize_query',
+    'plan_queries',
+    'price_rows',
+    'result_columns',
+    'summarize'
+]
@@ -0,0 +1,66 @@
+"""Client for CeX's JSON search API, which answers without rendering the site."""
+
+import time
+
+import requests
+
+from .config import CEX_API_URL
+from .governor import current_budget
+from .metrics import note_failure, timed
+from .net import get_http_session, get_rate_limiter
+
+API_PAGE_SIZE = 50  # Results per request
+API_TIMEOUT_SECONDS = 10  # Cut short to what is left of the lookup budget
+
+
+def search_cex_api(search_term, session=None, api_url=None, first_record=1, count=API_PAGE_SIZE):
+    """One page of search results as (title, price, url) candidates, and the total number of results.
+
+    Returns (None, 0) when the request fails, noting why on the current lookup trace.
+    """
+    session = session or get_http_session()
+    api_url = api_url or CEX_API_URL
+    params = {
+        'q': search_term,
+        'firstRecord': first_record,
+        'count': count,
+        'sortBy': 'relevance',
+        'sortOrder': 'desc'
+    }
+    limiter = get_rate_limiter()
+    try:
+        limiter.wait(api_url)
+        started = time.monotonic()
+        with timed('api_request'):
+            timeout = max(0.1, current_budget().timeout(API_TIMEOUT_SECONDS))
+            response = session.get(api_url, params=params, timeout=timeout)
+    except requests.RequestException as error:
+        limiter.record(api_url, error=True)
+        note_failure(f"api_error:{type(error).__name__}")
+        return None, 0
+    limiter.record(api_url, response.status_code, time.monotonic() - started)
+    if response.status_code != 200:
+        note_failure(f"api_http_{response.status_code}")
+        return None, 0
+    try:
+        data = (response.json().get('response') or {}).get('data') or {}
+        boxes = data.get('boxes') or []
+    except (ValueError, AttributeError):
+        note_failure('api_bad_response')
+        return None, 0
+    
+    candidates = []
+    for box in boxes:
+        title = box.get('boxName')
+        box_id = box.get('boxId')
+        if title and box_id:
+            candidates.append((title, _price_text(box.get('sellPrice')),
+                               f"https://uk.webuy.com/product-detail?id={box_id}"))
+    total = data.get('totalRecords')
+    return candidates, total if isinstance(total, int) else len(candidates)
+
+def _price_text(price):
+    """The API's sell price in the page's format ("350.00"), or None if it has none."""
+    if isinstance(price, (int, float)) and not isinstance(price, bool):
+        return f"{price:.2f}"
+    return str(price) if price is not None else None
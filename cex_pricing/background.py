@@ -0,0 +1,266 @@
+"""Pricing jobs that run in the background while a page polls their progress.
+
+    queue = JobQueue()
+    job = queue.submit(job_id, rows, columns, expected_rows=1000)
+    job.progress()  # status, rows priced, ETA...
+    job.recent_rows()  # latest priced rows
+    job.summary()  # match rate, price distribution... once it has finished
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .batch import NAME_COLUMN, price_rows
+from .cache import get_price_cache
+from .catalogue import get_catalogue
+from .config import BACKGROUND_JOBS, BACKGROUND_KEEP_JOBS, LOOKUP_WORKERS
+from .results import BUDGET_EXCEEDED, MATCHED, lookup_status
+from .matching import normalize_query
+from .table import ResultTable, export_csvs, export_results, summarize
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_ROWS = 200  # Most recent priced rows kept for showing progress
+ACTIVE = ('queued', 'running')
+
+
+class PricingJob:
+    """One submitted CSV: its rows are priced in order and collected in a ResultTable as they arrive.
+
+    status goes queued -> running -> done, or ends as 'cancelled' or 'failed'.
+    Counters are updated as each row is priced, so progress() can be polled
+    from any thread while the job runs. Once it has stopped, the results are
+    built into one typed DataFrame (frame()) that the summary and every
+    export are taken from.
+    """
+
+    def __init__(self, job_id, rows, columns, expected_rows=None, name_column=NAME_COLUMN, checkpoint=None):
+        self.job_id = job_id
+        self.columns = list(columns)
+        self.expected_rows = expected_rows
+        self.name_column = name_column
+        self.checkpoint = checkpoint
+        self.status = 'queued'
+        self.error = None
+        self.priced = 0
+        self.matched = 0
+        self.out_of_time = 0  # Rows whose lookup ran out of its time budget (not checkpointed)
+        self.total_value = 0.0
+        self.queries = set()
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cache_stats = None  # Price cache and catalogue hits/misses during the job, once finished
+        self._rows = rows
+        self._table = ResultTable(self.columns)
+        self._frame = None  # Built once the job has stopped
+        self._csvs = None  # (complete, matches-only) CSV bytes of the stopped job, once downloaded
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self, executor, workers=LOOKUP_WORKERS):
+        """Price every row, with lookups on the shared executor. Called by JobQueue on a job thread."""
+        with self._lock:
+            if self._cancelled.is_set():
+                return  # Cancelled while queued
+            self.status = 'running'
+            self.started_at = time.time()
+        cache_before, catalogue_before = get_price_cache().stats(), get_catalogue().stats()
+        status = 'done'
+        try:
+            for row, result in price_rows(self._rows, workers=workers, name_column=self.name_column,
+                                          checkpoint=self.checkpoint, executor=executor):
+                self._add(row, result)
+                if self._cancelled.is_set():
+                    status = 'cancelled'  # Rows priced so far stay checkpointed for a resume
+                    break
+        except Exception as error:
+            logger.exception("Pricing job %s failed", self.job_id)
+            self.error = f"{type(error).__name__}: {error}"
+            status = 'failed'
+        cache_after, catalogue_after = get_price_cache().stats(), get_catalogue().stats()
+        self.cache_stats = {
+            'cache_hits': cache_after['hits'] - cache_before['hits'],
+            'cache_misses': cache_after['misses'] - cache_before['misses'],
+            'cache_entries': cache_after['entries'],
+            'catalogue_hits': catalogue_after['hits'] - catalogue_before['hits']
+        }
+        self._finish(status)
+
+    def _add(self, row, result):
+        status = lookup_status(result)
+        name = row.get(self.name_column)
+        with self._lock:
+            self._table.append(row, result)
+            self.priced += 1
+            self.queries.add(normalize_query(name) if isinstance(name, str) else '')
+            if status == MATCHED:
+                self.matched += 1
+                if result.value is not None:
+                    self.total_value += result.value
+            elif status == BUDGET_EXCEEDED:
+                self.out_of_time += 1
+
+    def _finish(self, status):
+        self.status = status
+        self.finished_at = time.time()
+        self._finished.set()
+
+    def cancel(self):
+        """Stop after the row being priced now (or before starting); the job ends as 'cancelled'."""
+        with self._lock:
+            self._cancelled.set()
+            queued = self.status == 'queued'
+        if queued:
+            self._finish('cancelled')
+
+    def wait(self, timeout=None):
+        """Block until the job has stopped; returns whether it has."""
+        return self._finished.wait(timeout)
+
+    @property
+    def active(self):
+        return self.status in ACTIVE
+
+    def progress(self):
+        """Status, counts, throughput and estimated seconds left, as a dict."""
+        with self._lock:
+            priced, matched, total_value, unique = self.priced, self.matched, self.total_value, len(self.queries)
+            out_of_time = self.out_of_time
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        rate = priced / elapsed if elapsed > 0 else None
+        eta = None
+        if self.status == 'running' and rate and self.expected_rows:
+            eta = max(0.0, (self.expected_rows - priced) / rate)
+        return {
+            'status': self.status,
+            'priced': priced,
+            'expected': self.expected_rows,
+            'matched': matched,
+            'out_of_time': out_of_time,
+            'unique': unique,
+            'total_value': total_value,
+            'elapsed': elapsed,
+            'rows_per_second': rate,
+            'eta_seconds': eta,
+            'error': self.error
+        }
+
+    def recent_rows(self):
+        """The most recently priced output rows, oldest first."""
+        if self._frame is not None:
+            return self._frame.tail(PREVIEW_ROWS).to_dict('records')
+        with self._lock:
+            recent = self._table.to_frame(start=max(0, len(self._table) - PREVIEW_ROWS))
+        return recent.to_dict('records')
+
+    def frame(self):
+        """Every priced row so far as a DataFrame, with prices as float64 and status as a category."""
+        if self._frame is not None:
+            return self._frame
+        stopped = self._finished.is_set()
+        with self._lock:
+            frame = self._table.to_frame()
+        if stopped:
+            # No more rows will arrive: keep the frame and let the row-by-row columns go
+            self._frame, self._table = frame, ResultTable(self.columns)
+        return frame
+
+    def summary(self, category_column=None):
+        """Counts, match rate, total value and price distribution of the rows priced so far (see summarize)."""
+        return summarize(self.frame(), category_column)
+
+    def export(self, fmt='csv', matches_only=False):
+        """The rows priced so far as 'csv' bytes (optionally just the matches), or as 'parquet' or 'arrow'.
+
+        Built when asked for, e.g. when a download is clicked. Both CSVs come
+        from one serialisation and are kept for the other download; Parquet
+        and Arrow bytes are not kept.
+        """
+        frame = self.frame()
+        if fmt != 'csv':
+            return export_results(frame, fmt)
+        csvs = self._csvs
+        if csvs is None:
+            csvs = export_csvs(frame)
+            if frame is self._frame:
+                self._csvs = csvs
+        return csvs[1] if matches_only else csvs[0]
+
+    def release(self):
+        """Drop the stopped job's results (frame and CSVs), e.g. once it is no longer kept."""
+        self._frame, self._csvs = None, None
+        self._table = ResultTable(self.columns)
+
+class JobQueue:
+    """Run submitted jobs in the background, sharing one bounded pool of lookup threads.
+
+    At most `concurrency` jobs run at once and later ones wait their turn;
+    however many jobs are running, lookups never use more than `workers`
+    threads (and browsers stay capped by the shared driver pool). Jobs are
+    found again by ID, so a page rerun picks up the job it submitted rather
+    than starting another, and the last `keep` finished jobs are kept for
+    their results.
+    """
+
+    def __init__(self, concurrency=BACKGROUND_JOBS, workers=LOOKUP_WORKERS, keep=BACKGROUND_KEEP_JOBS):
+        self.workers = max(1, workers)
+        self.keep = keep
+        self._lookups = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cex-lookup')
+        self._runners = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='cex-job')
+        self._jobs = OrderedDict()  # job_id -> PricingJob, oldest submission first
+        self._lock = threading.Lock()
+
+    def submit(self, job_id, rows, columns, **kwargs):
+        """Queue a job to price `rows`, or return the job with this ID if it is still queued or running."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.active:
+                return job
+            if job is not None:
+                job.release()  # Replaced by the resumed or retried run
+            job = self._jobs[job_id] = PricingJob(job_id, rows, columns, **kwargs)
+            self._jobs.move_to_end(job_id)
+            finished = [key for key, other in self._jobs.items() if not other.active]
+            for key in finished[:max(0, len(finished) - self.keep)]:
+                self._jobs.pop(key).release()
+        self._runners.submit(job.run, self._lookups, self.workers)
+        return job
+
+    def get(self, job_id):
+        """The job submitted with this ID, if it is still known."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job_id):
+        """How many queued jobs will start before this one (0 once it is running)."""
+        with self._lock:
+            ahead = 0
+            for key, job in self._jobs.items():
+                if key == job_id:
+                    return ahead if job.status == 'queued' else 0
+                ahead += job.status == 'queued'
+            return 0
+
+    def cancel(self, job_id, wait=False, timeout=None):
+        """Cancel a job, optionally waiting for it to stop; returns the job, if known."""
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+            if wait:
+                job.wait(timeout)
+        return job
+
+    def shutdown(self):
+        """Cancel every job and stop the worker threads once they finish their current rows."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        self._runners.shutdown(wait=False)
+        self._lookups.shutdown(wait=False)
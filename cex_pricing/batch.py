@@ -0,0 +1,162 @@
+"""Concurrent lookups over many products."""
+
+import contextlib
+import csv
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from .config import LOOKUP_RETRIES, LOOKUP_WORKERS
+from .fetch import fetch_cex_price
+from .matching import normalize_query
+from .results import ERROR, MATCHED, LookupResult, as_result, lookup_status
+
+NAME_COLUMN = "Product Name"
+RESULT_COLUMNS = ["CeX Matched Product", "CeX Sell Price (GBP)", "CeX URL", "Lookup Status", "Scraped At (UTC)"]
+
+def result_columns(result):
+    """Output columns for one lookup result, stamped with the current time."""
+    match, price, url = result
+    return {
+        "CeX Matched Product": match,
+        "CeX Sell Price (GBP)": price,
+        "CeX URL": url,
+        "Lookup Status": lookup_status(result),
+        "Scraped At (UTC)": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+def plan_queries(product_names):
+    """Collapse product names that normalize to the same search query.
+
+    Returns (unique_names, row_groups): one representative name per distinct
+    query, and for each of them the input rows that share its result.
+    """
+    unique_names = []
+    row_groups = []
+    group_for_query = {}
+    for i, name in enumerate(product_names):
+        query = normalize_query(name) if isinstance(name, str) else ''
+        if query not in group_for_query:
+            group_for_query[query] = len(unique_names)
+            unique_names.append(name)
+            row_groups.append([])
+        row_groups[group_for_query[query]].append(i)
+    return unique_names, row_groups
+
+def submit_lookup(executor, product_name, retries=LOOKUP_RETRIES):
+    """Future of fetch_cex_price(product_name) on `executor`.
+
+    A transient failure (timed out, blocked, errored) goes back on the end of
+    the executor's queue, up to `retries` times, so other lookups run before
+    it is tried again and no thread sits waiting to retry it.
+    """
+    outcome = Future()
+
+    def attempt(retries_left):
+        executor.submit(fetch_cex_price, product_name).add_done_callback(
+            lambda future: settle(future, retries_left)
+        )
+
+    def settle(future, retries_left):
+        try:
+            result = as_result(future.result())
+        except Exception as error:
+            result = LookupResult.failed(ERROR, f"exception:{type(error).__name__}")
+        if result.retryable and retries_left > 0:
+            try:
+                attempt(retries_left - 1)
+                return
+            except RuntimeError:
+                pass  # Executor shut down - keep the failure
+        outcome.set_result(result)
+
+    attempt(retries)
+    return outcome
+
+def fetch_cex_prices(product_names, workers=LOOKUP_WORKERS, on_result=None, plan=None):
+    """Look up many products concurrently, returning results in input order.
+
+    Each distinct query (see plan_queries) is looked up once and its result
+    fanned out to every matching row; transient failures are retried (see
+    submit_lookup). `on_result(index, result, completed)` is called from the
+    calling thread for each row as its lookup completes, so it is safe to
+    update Streamlit elements from it.
+    """
+    unique_names, row_groups = plan or plan_queries(product_names)
+    results = [None] * len(product_names)
+    completed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {submit_lookup(executor, name): k for k, name in enumerate(unique_names)}
+        for future in as_completed(futures):
+            result = future.result()
+            for i in row_groups[futures[future]]:
+                results[i] = result
+                completed += 1
+                if on_result:
+                    on_result(i, result, completed)
+    return results
+
+class ResultCsvWriter:
+    """Write priced rows to a full results CSV and a matches-only CSV in a single pass."""
+
+    def __init__(self, full_file, matches_file, input_columns):
+        fieldnames = list(input_columns) + [c for c in RESULT_COLUMNS if c not in input_columns]
+        self._full = csv.DictWriter(full_file, fieldnames=fieldnames, extrasaction='ignore')
+        self._full.writeheader()
+        self._matches = None
+        if matches_file is not None:
+            self._matches = csv.DictWriter(matches_file, fieldnames=fieldnames, extrasaction='ignore')
+            self._matches.writeheader()
+
+    def write(self, row, result):
+        """Write one input row with its lookup result; returns the combined output row."""
+        record = {**row, **result_columns(result)}
+        self._full.writerow(record)
+        if self._matches is not None and lookup_status(result) == MATCHED:
+            self._matches.writerow(record)
+        return record
+
+def price_rows(rows, workers=LOOKUP_WORKERS, name_column=NAME_COLUMN, window=None, checkpoint=None, executor=None):
+    """Price an iterable of row dicts concurrently, yielding (row, result) in input order.
+
+    At most `window` rows (default four per worker) are in flight at once, so
+    inputs of any size stream through with only one result per distinct query
+    held. Rows that share a normalized query share one lookup for the whole
+    batch, even a failed one that the price cache doesn't keep, and transient
+    failures are re-queued (see submit_lookup). With a JobCheckpoint, rows it
+    already holds are replayed without a lookup and every new result except a
+    transient failure is saved to it as it is yielded, so a resume retries those. Lookups run on
+    `executor` when given, e.g. a pool shared by several jobs, otherwise on
+    `workers` threads of their own.
+    """
+    window = window or max(1, workers) * 4
+    pending = deque()  # (index, row, future, replayed from the checkpoint) in input order
+    lookups_by_query = {}  # query -> future of this batch's lookup for it
+    if executor is not None:
+        lookups = contextlib.nullcontext(executor)
+    else:
+        lookups = ThreadPoolExecutor(max_workers=max(1, workers))
+    with lookups as executor:
+        for index, row in enumerate(rows):
+            saved = checkpoint.completed.get(index) if checkpoint is not None else None
+            if saved is not None:
+                future = Future()
+                future.set_result(saved)
+            else:
+                name = row.get(name_column)
+                query = normalize_query(name) if isinstance(name, str) else ''
+                future = lookups_by_query.get(query)
+                if future is None:
+                    future = lookups_by_query[query] = submit_lookup(executor, name)
+            pending.append((index, row, future, saved is not None))
+            if len(pending) >= window:
+                yield _next_result(pending, checkpoint)
+        while pending:
+            yield _next_result(pending, checkpoint)
+
+def _next_result(pending, checkpoint):
+    index, row, future, replayed = pending.popleft()
+    result = future.result()
+    if checkpoint is not None and not replayed and not result.retryable:
+        checkpoint.record(index, result)
+    return row, result
@@ -0,0 +1,690 @@
+"""Headless browser management: driver resolution, launching, pooling and page readiness."""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote
+
+from .config import (
+    ALLOW_RESOURCES, BLOCK_RESOURCES, BROWSER_MAX_RSS_MB, DRIVER_MAX_PAGES, DRIVER_POOL_SIZE, TABS_PER_BROWSER
+)
+from .governor import (
+    BudgetExceededError, browser_capacity, browser_over_limit, current_budget, driver_pid, kill_process_tree,
+    memory_pressure, process_tree
+)
+from .metrics import current_trace, record, timed, use_trace
+from .net import get_rate_limiter
+
+# Try to import Selenium, fallback gracefully if not available
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.common.exceptions import SessionNotCreatedException, TimeoutException, WebDriverException
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
+    SELENIUM_AVAILABLE = True
+    SELENIUM_IMPORT_ERROR = None
+except ImportError as e:
+    SELENIUM_AVAILABLE = False
+    SELENIUM_IMPORT_ERROR = e
+
+logger = logging.getLogger(__name__)
+
+PAGE_LOAD_SECONDS = 15  # Longest a single page load may take
+
+
+def create_webdriver():
+    """Launch a headless Chrome browser, falling back to Firefox."""
+    driver = None
+    # Setup Chrome options for headless browsing (Streamlit Cloud compatible)
+    chrome_options = Options()
+    chrome_options.add_argument('--headless=new')  # Use new headless mode
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--disable-software-rasterizer')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('--disable-web-security')
+    chrome_options.add_argument('--disable-features=VizDisplayCompositor')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-plugins')
+    chrome_options.add_argument('--disable-background-timer-throttling')
+    chrome_options.add_argument('--disable-backgrounding-occluded-windows')
+    chrome_options.add_argument('--disable-renderer-backgrounding')
+    chrome_options.add_argument('--disable-background-networking')
+    chrome_options.add_argument(f'--remote-debugging-port={_free_port()}')  # Unique per browser in the pool
+    chrome_options.add_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    blocked_patterns = blocked_url_patterns()
+    if _blocks_category('images', blocked_patterns):
+        # Content setting that actually stops image loads (there is no --disable-images switch)
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+    
+    # Configure browser binaries for Streamlit Cloud
+    
+    # Try Chrome first with explicit binary paths
+    try:
+        # Set Chrome binary location explicitly
+        chrome_binary_paths = [
+            '/usr/bin/chromium',
+            '/usr/bin/chromium-browser',
+            '/usr/bin/google-chrome',
+            '/usr/bin/google-chrome-stable'
+        ]
+        
+        chrome_binary = None
+        for path in chrome_binary_paths:
+            if os.path.exists(path):
+                chrome_binary = path
+                break
+        
+        if chrome_binary:
+            chrome_options.binary_location = chrome_binary
+            # Driver path is resolved once per process and reused
+            resolver = get_driver_resolver()
+            try:
+                service = Service(resolver.chromedriver(chrome_binary))
+                driver = webdriver.Chrome(service=service, options=chrome_options)
+            except SessionNotCreatedException as chrome_version_error:
+                if not _is_version_mismatch(chrome_version_error):
+                    raise
+                # Browser was upgraded under us - resolve a matching driver once more
+                resolver.invalidate('chrome')
+                service = Service(resolver.chromedriver(chrome_binary))
+                driver = webdriver.Chrome(service=service, options=chrome_options)
+            _block_chrome_requests(driver, blocked_patterns)
+        else:
+            raise Exception("No Chrome binary found")
+            
+    except Exception as chrome_error:
+        # Fallback to Firefox silently
+        try:
+            from selenium.webdriver.firefox.options import Options as FirefoxOptions
+            
+            # Set Firefox binary location explicitly
+            firefox_binary_paths = [
+                '/usr/bin/firefox',
+                '/usr/bin/firefox-esr'
+            ]
+            
+            firefox_binary = None
+            for path in firefox_binary_paths:
+                if os.path.exists(path):
+                    firefox_binary = path
+                    break
+            
+            if not firefox_binary:
+                raise Exception("No Firefox binary found")
+            
+            firefox_options = FirefoxOptions()
+            firefox_options.add_argument('--headless')
+            firefox_options.add_argument('--no-sandbox')
+            firefox_options.add_argument('--disable-dev-shm-usage')
+            firefox_options.add_argument('--disable-gpu')
+            firefox_options.add_argument('--window-size=1920,1080')
+            firefox_options.add_argument('--disable-blink-features=AutomationControlled')
+            firefox_options.set_preference('general.useragent.override', 'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0')
+            firefox_options.set_preference('dom.webdriver.enabled', False)
+            for name, value in firefox_blocking_preferences(blocked_patterns).items():
+                firefox_options.set_preference(name, value)
+            firefox_options.binary_location = firefox_binary
+            
+            service = Service(get_driver_resolver().geckodriver(firefox_binary))
+            driver = webdriver.Firefox(service=service, options=firefox_options)
+            
+        except Exception as firefox_error:
+            logger.error("Both Chrome and Firefox failed: %s, %s", chrome_error, firefox_error)
+            raise firefox_error
+    driver.set_page_load_timeout(PAGE_LOAD_SECONDS)  # Lookups shorten it to their remaining budget
+    return driver
+
+# System driver locations (e.g. from the chromium-driver package) used before
+# webdriver-manager, so hosts without internet access can still launch browsers
+CHROMEDRIVER_PATHS = [
+    '/usr/bin/chromedriver',
+    '/usr/lib/chromium/chromedriver',
+    '/usr/lib/chromium-browser/chromedriver',
+    '/usr/local/bin/chromedriver'
+]
+GECKODRIVER_PATHS = [
+    '/usr/bin/geckodriver',
+    '/usr/local/bin/geckodriver'
+]
+
+def _major_version(executable):
+    """Major version reported by `executable --version`, or None if unknown."""
+    try:
+        output = subprocess.run([executable, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except Exception:
+        return None
+    match = re.search(r'(\d+)\.\d+', output)
+    return int(match.group(1)) if match else None
+
+def _is_version_mismatch(error):
+    message = str(error).lower()
+    return 'only supports' in message or 'browser version' in message
+
+class DriverResolver:
+    """Find chromedriver/geckodriver once per process and remember the path.
+
+    A system driver matching the installed browser's major version is preferred,
+    so air-gapped hosts never touch the network. webdriver-manager is only used
+    when no usable system driver exists, and its download cache is kept until a
+    version mismatch is reported through invalidate().
+    """
+
+    def __init__(self):
+        self._paths = {}  # browser -> resolved driver path
+        self._rejected = set()  # System drivers that failed with a version mismatch
+        self._lock = threading.Lock()
+
+    def chromedriver(self, browser_binary):
+        return self._resolve('chrome', browser_binary, 'chromedriver', CHROMEDRIVER_PATHS,
+                             lambda: ChromeDriverManager().install(), match_version=True)
+
+    def geckodriver(self, browser_binary):
+        from webdriver_manager.firefox import GeckoDriverManager
+        # geckodriver supports a range of Firefox releases, so any system copy will do
+        return self._resolve('firefox', browser_binary, 'geckodriver', GECKODRIVER_PATHS,
+                             lambda: GeckoDriverManager().install(), match_version=False)
+
+    def _resolve(self, browser, browser_binary, driver_name, candidates, download, match_version):
+        with self._lock:
+            if browser not in self._paths:
+                with timed('driver_install'):
+                    self._paths[browser] = (
+                        self._find_system_driver(browser_binary, driver_name, candidates, match_version)
+                        or download()
+                    )
+            return self._paths[browser]
+
+    def _find_system_driver(self, browser_binary, driver_name, candidates, match_version):
+        browser_version = _major_version(browser_binary) if match_version else None
+        for path in [shutil.which(driver_name)] + candidates:
+            if not path or path in self._rejected or not os.access(path, os.X_OK):
+                continue
+            if browser_version is None or _major_version(path) == browser_version:
+                return path
+        return None
+
+    def invalidate(self, browser):
+        """Forget the resolved driver after a version mismatch so it is resolved afresh."""
+        with self._lock:
+            path = self._paths.pop(browser, None)
+            if not path:
+                return
+            wdm_dir = Path.home() / '.wdm' / 'drivers'
+            if wdm_dir in Path(path).parents:
+                # Stale webdriver-manager download - clear its cache to force a new one
+                driver_dir = wdm_dir / ('chromedriver' if browser == 'chrome' else 'geckodriver')
+                shutil.rmtree(driver_dir, ignore_errors=True)
+            else:
+                self._rejected.add(path)
+
+@lru_cache(maxsize=None)
+def get_driver_resolver():
+    """Driver resolver shared by every lookup in this process."""
+    return DriverResolver()
+
+# URL patterns (CDP wildcard syntax) for requests a search page doesn't need, by category
+BLOCKED_RESOURCES = {
+    'images': ['*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*'],
+    'fonts': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*'],
+    'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*'],
+    'trackers': [
+        '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*', '*googlesyndication.com*',
+        '*googleadservices.com*', '*connect.facebook.net*', '*facebook.com/tr*', '*hotjar.com*',
+        '*clarity.ms*', '*bat.bing.com*', '*analytics.tiktok.com*', '*criteo.com*', '*criteo.net*',
+        '*scorecardresearch.com*', '*cookielaw.org*', '*onetrust.com*', '*trustpilot.com*', '*newrelic.com*',
+        '*nr-data.net*', '*sentry.io*'
+    ]
+}
+
+def blocked_url_patterns(allow=None):
+    """URL patterns to block, minus allowed categories and patterns containing an allowed fragment."""
+    if not BLOCK_RESOURCES:
+        return []
+    allow = ALLOW_RESOURCES if allow is None else allow
+    return [
+        pattern
+        for category, patterns in BLOCKED_RESOURCES.items() if category not in allow
+        for pattern in patterns if not any(fragment in pattern for fragment in allow)
+    ]
+
+def _blocks_category(category, patterns):
+    return any(pattern in patterns for pattern in BLOCKED_RESOURCES[category])
+
+def _block_chrome_requests(driver, patterns):
+    """Have Chrome fail matching requests before they leave the browser (DevTools protocol)."""
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as error:
+        logger.warning("Could not enable request blocking in Chrome: %s", error)
+
+def _block_tab_requests(driver):
+    """Block requests in the newly focused tab too: Chrome's blocklist is set per tab, Firefox's prefs cover them all."""
+    if hasattr(driver, 'execute_cdp_cmd'):
+        _block_chrome_requests(driver, blocked_url_patterns())
+
+def firefox_blocking_preferences(patterns):
+    """Firefox preferences that stop images, web fonts and requests to blocked hosts.
+
+    Firefox has no URL blocklist preference, so host patterns are routed by a
+    proxy auto-config script to a closed local port, which fails them at once.
+    """
+    if not patterns:
+        return {}
+    prefs = {}
+    if _blocks_category('images', patterns):
+        prefs['permissions.default.image'] = 2
+    if _blocks_category('fonts', patterns):
+        prefs['gfx.downloadable_fonts.enabled'] = False
+    if _blocks_category('media', patterns):
+        prefs['media.autoplay.default'] = 5
+    # PAC scripts only see the origin of https URLs, so only host patterns can be routed
+    hosts = [pattern for pattern in patterns if not pattern.startswith('*.')]
+    if hosts:
+        condition = ' || '.join(f'shExpMatch(url, {json.dumps(pattern)})' for pattern in hosts)
+        pac = f'function FindProxyForURL(url, host) {{ return ({condition}) ? "PROXY 127.0.0.1:9" : "DIRECT"; }}'
+        prefs['network.proxy.type'] = 2
+        prefs['network.proxy.autoconfig_url'] = 'data:application/x-ns-proxy-autoconfig,' + quote(pac)
+    return prefs
+
+def _free_port():
+    """Ask the OS for an unused local port so concurrent browsers don't collide."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _driver_alive(driver):
+    """Cheap health check - any WebDriver command fails once the browser has crashed."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+def _quit_driver(driver):
+    """Quit a browser, then kill any of its processes that outlived quit() (e.g. a hung renderer)."""
+    pid = driver_pid(driver)
+    processes = process_tree(pid) if pid else []  # Listed first: quitting orphans the browser's children
+    try:
+        driver.quit()
+    except Exception:
+        pass  # Ignore cleanup errors
+    kill_process_tree(processes)
+
+class DriverUnavailableError(RuntimeError):
+    """No browser could be leased: launching one failed or the pool is shut down."""
+
+class DriverPool:
+    """Keep up to `size` browsers alive and lease them out one lookup at a time.
+
+    Browsers are launched on first demand and then reused, so the cost of
+    starting Chrome/Firefox is paid once rather than per product. Each browser
+    is health-checked before it is leased and recycled after `max_pages`
+    lookups, when a lookup fails with a WebDriver error, or when its processes
+    use more than `max_rss_mb` (or any browser, while memory is short). No new
+    browser is launched while memory is short and others are still running.
+    """
+
+    def __init__(self, size=DRIVER_POOL_SIZE, max_pages=DRIVER_MAX_PAGES, factory=None, max_rss_mb=BROWSER_MAX_RSS_MB):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.factory = factory or create_webdriver
+        self._idle = []  # [driver, pages_served] entries ready to lease
+        self._leased = {}  # id(driver) -> entry, for browsers currently lent out
+        self._live = 0  # Browsers launched and not yet quit (idle + leased)
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _acquire(self, deadline=None):
+        while True:
+            with self._cond:
+                while not self._idle and not self._can_launch() and not self._closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise BudgetExceededError("No browser came free within the lookup budget")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise DriverUnavailableError("Driver pool has been shut down")
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._live += 1
+                    entry = None
+
+            if entry is None:
+                try:
+                    with timed('driver_start'):
+                        return [self.factory(), 0]
+                except Exception as error:
+                    self._discard(None)
+                    raise DriverUnavailableError(f"Could not start a browser: {error}") from error
+
+            if entry[1] < self.max_pages and _driver_alive(entry[0]):
+                return entry
+            self._discard(entry[0])
+
+    def _can_launch(self):
+        return self._live < self.size and not (self._live and memory_pressure())
+
+    def over_limit(self, driver):
+        """Whether a browser has outgrown its memory allowance (or memory is short) and should be recycled."""
+        return browser_over_limit(driver, self.max_rss_mb) is not None
+
+    def _discard(self, driver):
+        if driver is not None:
+            _quit_driver(driver)
+        with self._cond:
+            self._live -= 1
+            self._cond.notify()
+
+    def _release(self, entry, healthy):
+        entry[1] += 1
+        healthy = healthy and not self.over_limit(entry[0])
+        with self._cond:
+            self._leased.pop(id(entry[0]), None)
+            if healthy and not self._closed:
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._discard(entry[0])
+
+    @contextmanager
+    def lease(self, deadline=None):
+        """Borrow a browser for one lookup and hand it back afterwards.
+
+        Raises BudgetExceededError if none comes free before the monotonic deadline.
+        """
+        with timed('driver_acquire'):
+            entry = self._acquire(deadline)
+        with self._cond:
+            self._leased[id(entry[0])] = entry
+        healthy = True
+        try:
+            yield entry[0]
+        except WebDriverException:
+            healthy = False  # Browser crashed or lost its session - recycle it
+            raise
+        finally:
+            self._release(entry, healthy)
+
+    def record_pages(self, driver, count=1):
+        """Count extra pages loaded by a leased browser; returns how many it has served."""
+        with self._cond:
+            entry = self._leased[id(driver)]
+            entry[1] += count
+            return entry[1]
+
+    def shutdown(self):
+        """Quit idle browsers now; leased ones are quit when they are returned."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver, _ in idle:
+            self._discard(driver)
+
+@lru_cache(maxsize=None)
+def get_driver_pool():
+    """Browser pool shared by every lookup in this process, as large as memory allows."""
+    size = browser_capacity(DRIVER_POOL_SIZE)
+    if size < DRIVER_POOL_SIZE:
+        logger.warning("Memory limit allows %d of %d pooled browsers", size, DRIVER_POOL_SIZE)
+    pool = DriverPool(size)
+    atexit.register(pool.shutdown)
+    return pool
+
+TAB_POLL_SECONDS = 0.05  # Pause between readiness sweeps over a browser's loading tabs
+
+class TabScheduler:
+    """Load several pages at once in the tabs of each pooled browser.
+
+    A WebDriver session handles one command at a time and only ever looks at
+    one tab, so each leased browser is driven by a single thread: it starts
+    navigations in up to `tabs` tabs without waiting for them to load, then
+    sweeps the tabs for readiness and harvests each one as soon as it is
+    ready, refilling the freed tab from the queue. Lookups on other threads
+    just submit() a URL and wait on the returned future. A browser that
+    outgrows its memory allowance takes no new pages and is recycled once its
+    loading tabs are harvested.
+    """
+
+    def __init__(self, pool, tabs=TABS_PER_BROWSER):
+        self.pool = pool
+        self.tabs = max(1, tabs)
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, url, harvest, deadline=None):
+        """Load url in a free tab and return a Future of harvest(driver, fired, deadline).
+
+        harvest runs on the browser's thread with the tab focused, once the page
+        is ready or the monotonic deadline (default: the current lookup budget's)
+        has passed (fired is then 'timeout'), and records into the submitting
+        thread's lookup trace. A job still queued at its deadline fails with
+        BudgetExceededError, and one cancelled while queued is skipped.
+
+        The per-host rate limit is waited out here, on the submitting thread,
+        so the browser's thread never sleeps while its other tabs are ready;
+        a wait that would pass the deadline raises BudgetExceededError.
+        """
+        future = Future()
+        deadline = current_budget().deadline if deadline is None else deadline
+        get_rate_limiter().wait(url, deadline)
+        self._queue.put((url, harvest, future, current_trace(), deadline))
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if len(self._threads) < self.pool.size:
+                thread = threading.Thread(target=self._run, name='cex-tabs', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                with self.pool.lease() as driver:
+                    self._drive(driver, job)
+            except Exception as error:
+                _fail(job[2], error)
+
+    def _drive(self, driver, first_job):
+        """Keep this browser's tabs busy until the queue runs dry or it is due for recycling."""
+        free = list(driver.window_handles)[:self.tabs]
+        opened = len(free)
+        loading = {}  # handle -> (job, started)
+        jobs = [first_job]
+        served = 0
+        recycling = False  # Over its memory allowance: finish the loading tabs, take nothing new
+        try:
+            while True:
+                while jobs or (not recycling and served < self.pool.max_pages and (free or opened < self.tabs)):
+                    if not jobs:
+                        try:
+                            jobs.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+                    if not self._claim(jobs[-1]):
+                        jobs.pop()
+                        continue
+                    if free:
+                        handle = free.pop()
+                    else:
+                        driver.switch_to.new_window('tab')
+                        handle = driver.current_window_handle
+                        _block_tab_requests(driver)
+                        opened += 1
+                    loading[handle] = (jobs[-1], self._navigate(driver, handle, jobs[-1]))
+                    jobs.pop()
+                    served = self.pool.record_pages(driver)
+                if not loading:
+                    return
+
+                harvested = False
+                for handle, (job, started) in list(loading.items()):
+                    driver.switch_to.window(handle)
+                    fired = driver.execute_script(_TAB_READY_JS, READY_INDICATORS, RESULTS_SETTLE_MS, PAGE_QUIET_MS)
+                    if not fired and time.monotonic() < job[4]:
+                        continue
+                    del loading[handle]
+                    self._harvest(driver, job, started, fired or 'timeout')
+                    free.append(handle)
+                    harvested = True
+                if not harvested:
+                    time.sleep(TAB_POLL_SECONDS)
+                elif not recycling:
+                    recycling = self.pool.over_limit(driver)
+        except Exception as error:
+            # The browser itself failed: every lookup waiting on it fails too
+            for job in jobs + [state[0] for state in loading.values()]:
+                _fail(job[2], error)
+            raise
+
+    def _claim(self, job):
+        """Start a queued job; False if it was cancelled or its deadline passed while it waited."""
+        future, deadline = job[2], job[4]
+        if not future.set_running_or_notify_cancel():
+            return False
+        if time.monotonic() >= deadline:
+            future.set_exception(BudgetExceededError("Lookup budget spent waiting for a browser tab"))
+            return False
+        return True
+
+    def _navigate(self, driver, handle, job):
+        """Start loading a job's URL in a tab without waiting for it; returns when it started."""
+        url, _, _, trace, _ = job
+        driver.switch_to.window(handle)
+        started = time.monotonic()
+        with use_trace(trace), timed('navigate'):
+            # Marks the outgoing page so the readiness check can't fire on it
+            driver.execute_script('window.__cexStale = true; window.location.assign(arguments[0]);', url)
+        return started
+
+    def _harvest(self, driver, job, started, fired):
+        url, harvest, future, trace, deadline = job
+        elapsed = time.monotonic() - started
+        get_rate_limiter().record(url, latency=elapsed)
+        with use_trace(trace):
+            record('ready_wait', elapsed)
+            try:
+                future.set_result(harvest(driver, fired, deadline))
+            except WebDriverException as error:
+                future.set_exception(error)
+                raise  # Fails this browser's other tabs as well, and recycles it
+            except Exception as error:
+                future.set_exception(error)
+
+def _fail(future, error):
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        pass  # Already finished, or cancelled by a lookup that gave up on it
+
+@lru_cache(maxsize=None)
+def get_tab_scheduler():
+    """Tab scheduler over the shared browser pool."""
+    return TabScheduler(get_driver_pool())
+
+# Elements that only exist once search results have rendered
+READY_INDICATORS = [
+    'a[href*="/product-detail"]',
+    'a[href*="product"]'
+]
+RESULTS_SETTLE_MS = 300  # DOM quiet time after results appear (late prices/images)
+PAGE_QUIET_MS = 1500  # DOM quiet time that means the page has finished without results
+
+# Installs a MutationObserver recording the time of the latest DOM change
+_DOM_WATCH_JS = """
+if (!window.__cexMutationObserver) {
+    window.__cexMutationObserver = new MutationObserver(function () {
+        window.__cexLastMutation = Date.now();
+    });
+    window.__cexMutationObserver.observe(document, {childList: true, subtree: true, characterData: true});
+}
+window.__cexLastMutation = Date.now();
+"""
+
+# Returns the readiness condition that holds right now, or null
+_READY_CHECK_JS = """
+var selectors = arguments[0], settleMs = arguments[1], quietMs = arguments[2];
+var quietFor = Date.now() - (window.__cexLastMutation || 0);
+for (var i = 0; i < selectors.length; i++) {
+    if (document.querySelector(selectors[i]) && quietFor >= settleMs) {
+        return 'indicator:' + selectors[i];
+    }
+}
+if (document.readyState === 'complete' && quietFor >= quietMs) {
+    return 'dom-quiet';
+}
+return null;
+"""
+
+# Readiness check for a tab that was navigated without waiting: nothing fires until the
+# new page has replaced the old one, and the DOM watcher is installed on first sight
+_TAB_READY_JS = """
+if (window.__cexStale || document.readyState === 'loading') {
+    return null;
+}
+if (!window.__cexMutationObserver) {
+""" + _DOM_WATCH_JS + """
+}
+""" + _READY_CHECK_JS
+
+def wait_for_page_ready(driver, deadline):
+    """Wait on one combined readiness condition until the monotonic deadline.
+
+    Fires as soon as a results indicator is present and the DOM has stopped
+    changing, or when the page has been quiet long enough to mean no results
+    are coming. Returns which condition fired: 'indicator:<selector>',
+    'dom-quiet' or 'timeout'.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return 'timeout'
+    try:
+        driver.execute_script(_DOM_WATCH_JS)
+        return WebDriverWait(driver, remaining, poll_frequency=0.1).until(
+            lambda d: d.execute_script(_READY_CHECK_JS, READY_INDICATORS, RESULTS_SETTLE_MS, PAGE_QUIET_MS)
+        )
+    except TimeoutException:
+        return 'timeout'
+
+# Requests the page made and bytes it transferred, from the Resource Timing API.
+# Cross-origin responses without Timing-Allow-Origin report 0 bytes, so this is a floor
+_PAGE_WEIGHT_JS = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var bytes = 0;
+for (var i = 0; i < entries.length; i++) {
+    bytes += entries[i].transferSize || entries[i].encodedBodySize || 0;
+}
+return [entries.length, bytes];
+"""
+
+def page_weight(driver):
+    """(requests, bytes) loaded by the current page, or None if the browser can't say."""
+    try:
+        requests_made, transferred = driver.execute_script(_PAGE_WEIGHT_JS)
+        return int(requests_made), int(transferred)
+    except Exception:
+        return None
@@ -0,0 +1,89 @@
+"""Persistent on-disk cache of lookup results."""
+
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from .config import CACHE_MAX_ENTRIES, CACHE_NEGATIVE_TTL_SECONDS, CACHE_PATH, CACHE_TTL_SECONDS
+from .matching import normalize_query
+from .results import MATCHED, LookupResult
+
+
+class PriceCache:
+    """SQLite-backed lookup cache shared across sessions and restarts.
+
+    Entries are keyed on normalize_query(), expire after `ttl` seconds (or
+    `negative_ttl` for lookups that found nothing) and the least recently used
+    ones are evicted once the cache holds more than `max_entries`.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL_SECONDS, negative_ttl=CACHE_NEGATIVE_TTL_SECONDS,
+                 max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS prices ('
+            'query TEXT PRIMARY KEY, match TEXT, price TEXT, url TEXT, status TEXT, score REAL, '
+            'stored_at REAL NOT NULL, last_used REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS prices_last_used ON prices (last_used)')
+
+    def get(self, product_name):
+        """Cached LookupResult for product_name, or None on a miss."""
+        query = normalize_query(product_name)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT match, price, url, status, score, stored_at FROM prices WHERE query = ?', (query,)
+            ).fetchone()
+            if row is not None:
+                match, price, url, status, score, stored_at = row
+                # Only matches are kept for the long TTL; no-matches and unverified fallback prices expire sooner
+                matched = status == MATCHED if status else price is not None
+                ttl = self.ttl if matched else self.negative_ttl
+                if now - stored_at < ttl:
+                    self._db.execute('UPDATE prices SET last_used = ? WHERE query = ?', (now, query))
+                    self.hits += 1
+                    return LookupResult(match, price, url, status=status, score=score, strategy='cache')
+                self._db.execute('DELETE FROM prices WHERE query = ?', (query,))
+            self.misses += 1
+            return None
+
+    def put(self, product_name, result):
+        """Store a lookup result (a LookupResult, or a plain (match, price, url))."""
+        query = normalize_query(product_name)
+        match, price, url = result
+        status, score = getattr(result, 'status', None), getattr(result, 'score', None)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO prices (query, match, price, url, status, score, stored_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (query, match, price, url, status, score, now, now)
+            )
+            excess = self._db.execute('SELECT COUNT(*) FROM prices').fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    'DELETE FROM prices WHERE query IN '
+                    '(SELECT query FROM prices ORDER BY last_used LIMIT ?)', (excess,)
+                )
+
+    def stats(self):
+        """Hit/miss counters since startup and the number of stored entries."""
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM prices').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entries': entries}
+
+@lru_cache(maxsize=None)
+def get_price_cache():
+    """Price cache shared by every lookup in this process."""
+    return PriceCache()
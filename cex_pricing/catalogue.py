@@ -0,0 +1,171 @@
+"""Local snapshot of CeX search results, for answering lookups without going to the site.
+
+Harvesting searches the JSON API for each term and stores every result
+(title, URL, sell price and when it was seen) on disk. Lookups are matched
+against an in-memory index of the snapshot; anything not matched, or matched
+to an entry older than the TTL, goes to the site as before.
+
+    python -m cex_pricing catalogue harvest "iphone 14" "playstation 5"
+    python -m cex_pricing catalogue harvest --from-csv products.csv
+    python -m cex_pricing catalogue refresh
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from .api import API_PAGE_SIZE, search_cex_api
+from .config import (
+    CATALOGUE_MATCH_THRESHOLD, CATALOGUE_MAX_PAGES, CATALOGUE_PATH, CATALOGUE_TTL_SECONDS, LOOKUP_WORKERS
+)
+from .matching import TokenMatcher, normalize_query, priced_candidates
+from .results import LookupResult
+
+RELOAD_CHECK_SECONDS = 5  # How often lookups check whether another process harvested
+
+
+class Catalogue:
+    """Harvested search results on disk, indexed in memory for lookups.
+
+    Each harvested term remembers when it was last searched, so refresh()
+    searches again only the terms older than `ttl`. A term's products that a
+    harvest no longer finds are dropped as delisted.
+    """
+
+    def __init__(self, path=CATALOGUE_PATH, ttl=CATALOGUE_TTL_SECONDS, threshold=CATALOGUE_MATCH_THRESHOLD):
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS products (url TEXT PRIMARY KEY, title TEXT NOT NULL, '
+            'price TEXT NOT NULL, term TEXT NOT NULL, seen_at REAL NOT NULL) WITHOUT ROWID'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS products_term ON products (term)')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, harvested_at REAL NOT NULL, '
+            'results INTEGER NOT NULL) WITHOUT ROWID'
+        )
+        self._index = None  # (TokenMatcher, {url: seen_at}), built on first lookup
+        self._data_version = None
+        self._checked_at = 0.0
+
+    def lookup(self, product_name):
+        """Fresh LookupResult from the snapshot, or None if the site has to be searched."""
+        matcher, seen_at = self._current_index()
+        if not len(matcher):
+            return None  # Nothing harvested
+        (match, price, url), score = matcher.best_scored(product_name)
+        if match is None or time.time() - seen_at[url] >= self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return LookupResult(match, price, url, score=score, strategy='catalogue')
+
+    def _current_index(self):
+        now = time.monotonic()
+        if self._index is None or now - self._checked_at >= RELOAD_CHECK_SECONDS:
+            with self._lock:
+                # data_version only changes when another connection commits, e.g. a CLI harvest
+                version = self._db.execute('PRAGMA data_version').fetchone()[0]
+                if self._index is None or version != self._data_version:
+                    self._index = self._build_index()
+                    self._data_version = version
+                self._checked_at = now
+        return self._index
+
+    def _build_index(self):
+        matcher = TokenMatcher(self.threshold)
+        seen_at = {}
+        for title, price, url, seen in self._db.execute('SELECT title, price, url, seen_at FROM products'):
+            matcher.add(title, price, url)
+            seen_at[url] = seen
+        return matcher, seen_at
+
+    def harvest(self, terms, workers=LOOKUP_WORKERS, max_pages=CATALOGUE_MAX_PAGES, session=None, api_url=None):
+        """Search for every term and store all of its results; returns the number of products stored.
+
+        Terms whose search fails keep what the snapshot already holds for them.
+        """
+        terms = list(dict.fromkeys(normalize_query(term) for term in terms if term and term.strip()))
+        stored = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            crawls = executor.map(lambda term: self._crawl(term, max_pages, session, api_url), terms)
+            for term, products in zip(terms, crawls):
+                if products is not None:
+                    self._store(term, products)
+                    stored += len(products)
+        with self._lock:
+            self._index = self._build_index()
+        return stored
+
+    def _crawl(self, term, max_pages, session, api_url):
+        """Every result for a search term, or None if any page of it failed."""
+        products = []
+        for page in range(max(1, max_pages)):
+            candidates, total = search_cex_api(term, session, api_url, first_record=page * API_PAGE_SIZE + 1)
+            if candidates is None:
+                return None
+            products.extend(candidates)
+            if len(candidates) < API_PAGE_SIZE or len(products) >= total:
+                break
+        return products
+
+    def _store(self, term, products):
+        products = list(priced_candidates(products))  # Boxes CeX lists without a sell price can't answer lookups
+        now = time.time()
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany(
+                    'INSERT OR REPLACE INTO products (url, title, price, term, seen_at) VALUES (?, ?, ?, ?, ?)',
+                    [(url, title, price, term, now) for title, price, url in products]
+                )
+                # Found by this term last time but not now - no longer listed
+                self._db.execute('DELETE FROM products WHERE term = ? AND seen_at < ?', (term, now))
+                self._db.execute(
+                    'INSERT OR REPLACE INTO terms (term, harvested_at, results) VALUES (?, ?, ?)',
+                    (term, now, len(products))
+                )
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def stale_terms(self, max_age=None):
+        """Harvested terms last searched more than `max_age` (default: the TTL) seconds ago."""
+        cutoff = time.time() - (self.ttl if max_age is None else max_age)
+        with self._lock:
+            rows = self._db.execute('SELECT term FROM terms WHERE harvested_at < ? ORDER BY harvested_at', (cutoff,))
+            return [term for term, in rows]
+
+    def refresh(self, max_age=None, **kwargs):
+        """Harvest again only the terms that have gone stale; returns the number of products stored."""
+        return self.harvest(self.stale_terms(max_age), **kwargs)
+
+    def stats(self):
+        """Snapshot size and freshness, and lookups answered from it since startup."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            products, fresh = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(seen_at >= ?), 0) FROM products', (cutoff,)
+            ).fetchone()
+            terms, stale = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(harvested_at < ?), 0) FROM terms', (cutoff,)
+            ).fetchone()
+        return {'products': products, 'fresh_products': fresh, 'terms': terms, 'stale_terms': stale,
+                'hits': self.hits, 'misses': self.misses}
+
+@lru_cache(maxsize=None)
+def get_catalogue():
+    """Catalogue snapshot shared by every lookup in this process."""
+    return Catalogue()
@@ -0,0 +1,125 @@
+"""Command line entry point for batch pricing without the Streamlit app.
+
+    python -m cex_pricing price input.csv -o out.csv --workers 8
+    python -m cex_pricing catalogue harvest --from-csv input.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import logging
+import sys
+
+from .batch import NAME_COLUMN, ResultCsvWriter, price_rows
+from .catalogue import get_catalogue
+from .config import LOOKUP_WORKERS
+from .results import BUDGET_EXCEEDED, MATCHED, lookup_status
+from .jobs import JobCheckpoint, file_job_id
+from .metrics import get_metrics
+
+
+def _open_csv(path, mode):
+    """Open a CSV file for streaming, with "-" meaning stdin/stdout."""
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin if mode == 'r' else sys.stdout)
+    return open(path, mode, newline='', encoding='utf-8')
+
+def price_csv(input_path, output_path, workers=LOOKUP_WORKERS, name_column=NAME_COLUMN, matches_path=None,
+              resume=False, metrics_path=None):
+    """Price every row of a CSV, writing each result row as soon as it is ready.
+
+    With `resume`, rows priced by an earlier interrupted run of the same file
+    are taken from its checkpoint instead of being looked up again. With
+    `metrics_path`, per-stage timings and lookup traces are saved there as JSON.
+    """
+    checkpoint = None
+    if resume:
+        if input_path == '-':
+            print("--resume needs an input file, not stdin.", file=sys.stderr)
+            return 2
+        checkpoint = JobCheckpoint(file_job_id(input_path))
+        if checkpoint.resumed:
+            print(f"Resuming job {checkpoint.job_id}: {checkpoint.resumed} rows already priced", file=sys.stderr)
+    with contextlib.ExitStack() as files:
+        source = files.enter_context(_open_csv(input_path, 'r'))
+        reader = csv.DictReader(source)
+        if name_column not in (reader.fieldnames or []):
+            print(f"CSV must contain a '{name_column}' column.", file=sys.stderr)
+            return 2
+        
+        target = files.enter_context(_open_csv(output_path, 'w'))
+        matches = files.enter_context(_open_csv(matches_path, 'w')) if matches_path else None
+        writer = ResultCsvWriter(target, matches, reader.fieldnames)
+        priced = matched = out_of_time = 0
+        for row, result in price_rows(reader, workers=workers, name_column=name_column, checkpoint=checkpoint):
+            writer.write(row, result)
+            target.flush()
+            priced += 1
+            status = lookup_status(result)
+            matched += status == MATCHED
+            out_of_time += status == BUDGET_EXCEEDED
+    
+    print(f"Priced {priced} rows: {matched} matched", file=sys.stderr)
+    if out_of_time:
+        print(f"{out_of_time} rows ran out of time; run again to retry them", file=sys.stderr)
+    if metrics_path:
+        with open(metrics_path, 'w', encoding='utf-8') as f:
+            f.write(get_metrics().to_json(indent=2))
+    return 0
+
+def manage_catalogue(action, terms=(), csv_path=None, name_column=NAME_COLUMN, max_age=None, workers=LOOKUP_WORKERS):
+    """Harvest search terms (or a CSV's product names) into the catalogue snapshot, refresh it or report on it."""
+    catalogue = get_catalogue()
+    if action == 'harvest':
+        terms = list(terms)
+        if csv_path:
+            with _open_csv(csv_path, 'r') as source:
+                reader = csv.DictReader(source)
+                if name_column not in (reader.fieldnames or []):
+                    print(f"CSV must contain a '{name_column}' column.", file=sys.stderr)
+                    return 2
+                terms.extend(row[name_column] for row in reader)
+        if not terms:
+            print("Give search terms to harvest, or --from-csv.", file=sys.stderr)
+            return 2
+        stored = catalogue.harvest(terms, workers=workers)
+        print(f"Harvested {stored} products", file=sys.stderr)
+    elif action == 'refresh':
+        stale = catalogue.stale_terms(max_age)
+        stored = catalogue.refresh(max_age, workers=workers)
+        print(f"Refreshed {len(stale)} stale terms: {stored} products", file=sys.stderr)
+    stats = catalogue.stats()
+    print(f"Catalogue: {stats['products']} products ({stats['fresh_products']} fresh) "
+          f"from {stats['terms']} search terms ({stats['stale_terms']} stale)", file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m cex_pricing', description="Look up CeX (UK) sell prices.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    price = commands.add_parser('price', help=f"Price every row of a CSV with a '{NAME_COLUMN}' column")
+    price.add_argument('input', help='CSV file to price, or - for stdin')
+    price.add_argument('-o', '--output', default='-', help='Where to write the priced CSV (default: stdout)')
+    price.add_argument('--matches-output', help='Also write only the rows that found a match to this CSV')
+    price.add_argument('--workers', type=int, default=LOOKUP_WORKERS,
+                       help=f'Concurrent lookups (default: {LOOKUP_WORKERS}); browsers are capped by CEX_DRIVER_POOL_SIZE x CEX_TABS_PER_BROWSER')
+    price.add_argument('--column', default=NAME_COLUMN, help=f"Column holding product names (default: '{NAME_COLUMN}')")
+    price.add_argument('--resume', action='store_true',
+                       help='Checkpoint rows as they are priced and skip rows an earlier run of this file finished')
+    price.add_argument('--metrics', metavar='FILE', help='Write per-stage timings and lookup traces to this JSON file')
+    
+    catalogue = commands.add_parser('catalogue', help='Harvest CeX search results for answering lookups locally')
+    catalogue.add_argument('action', choices=['harvest', 'refresh', 'stats'],
+                           help='harvest search terms, refresh only stale terms, or show the snapshot size')
+    catalogue.add_argument('terms', nargs='*', help='Search terms to harvest')
+    catalogue.add_argument('--from-csv', metavar='FILE', help='Also harvest the product names in this CSV')
+    catalogue.add_argument('--column', default=NAME_COLUMN, help=f"Column holding product names (default: '{NAME_COLUMN}')")
+    catalogue.add_argument('--max-age', type=float, help='Refresh terms older than this many seconds (default: the TTL)')
+    catalogue.add_argument('--workers', type=int, default=LOOKUP_WORKERS, help='Concurrent searches')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+    if args.command == 'catalogue':
+        return manage_catalogue(args.action, args.terms, args.from_csv, args.column, args.max_age, args.workers)
+    return price_csv(args.input, args.output, args.workers, args.column, args.matches_output,
+                     args.resume, args.metrics)
@@ -0,0 +1,96 @@
+"""Settings for the pricing pipeline, overridable through CEX_* environment variables."""
+
+import importlib.util
+import os
+from pathlib import Path
+
+# Browser pool settings - starting a browser costs far more than a search,
+# so browsers are kept alive and reused across lookups
+DRIVER_POOL_SIZE = int(os.environ.get('CEX_DRIVER_POOL_SIZE', '2'))  # Browsers kept alive
+DRIVER_MAX_PAGES = int(os.environ.get('CEX_DRIVER_MAX_PAGES', '50'))  # Lookups before a browser is recycled
+# Each browser can also load several searches at once in separate tabs, which adds
+# parallelism for a fraction of the memory of another browser. 1 keeps one lookup per browser
+TABS_PER_BROWSER = int(os.environ.get('CEX_TABS_PER_BROWSER', '1'))
+
+# Browser memory - the pool launches no more browsers than fit in the container's memory
+# limit (cgroup, else the machine's), and a browser whose processes grow past
+# CEX_BROWSER_MAX_RSS_MB, or any browser while memory use is above the high watermark,
+# is quit and its processes killed instead of being reused
+BROWSER_MEMORY_MB = int(os.environ.get('CEX_BROWSER_MEMORY_MB', '300'))  # Expected size of one browser
+MEMORY_RESERVE_MB = int(os.environ.get('CEX_MEMORY_RESERVE_MB', '400'))  # Left for the app itself
+BROWSER_MAX_RSS_MB = int(os.environ.get('CEX_BROWSER_MAX_RSS_MB', '600'))  # 0 disables the check
+MEMORY_HIGH_WATERMARK = float(os.environ.get('CEX_MEMORY_HIGH_WATERMARK', '0.9'))  # Fraction of the limit
+
+# Resource blocking - search pages only need their HTML and scripts, so images, fonts,
+# media and trackers are not downloaded. CEX_ALLOW_RESOURCES lists categories
+# ('images', 'fonts', 'media', 'trackers') or URL fragments to let through anyway
+BLOCK_RESOURCES = os.environ.get('CEX_BLOCK_RESOURCES', '1') != '0'
+ALLOW_RESOURCES = [item.strip() for item in os.environ.get('CEX_ALLOW_RESOURCES', '').split(',') if item.strip()]
+
+# Batch settings - lookups run in parallel but requests to each host are spaced out
+LOOKUP_WORKERS = int(os.environ.get('CEX_LOOKUP_WORKERS', str(DRIVER_POOL_SIZE * max(1, TABS_PER_BROWSER))))  # Concurrent lookups
+REQUESTS_PER_SECOND = float(os.environ.get('CEX_REQUESTS_PER_SECOND', '2'))  # Starting per-host rate, 0 disables
+LOOKUP_RETRIES = int(os.environ.get('CEX_LOOKUP_RETRIES', '1'))  # Re-queues of a timed-out, blocked or failed lookup
+
+# Adaptive rate limiting - the per-host rate creeps up while CeX answers promptly
+# and is cut back sharply on 429s, 5xx, errors and slow responses (AIMD)
+MIN_REQUESTS_PER_SECOND = float(os.environ.get('CEX_MIN_REQUESTS_PER_SECOND', '0.25'))
+MAX_REQUESTS_PER_SECOND = float(os.environ.get('CEX_MAX_REQUESTS_PER_SECOND', '8'))
+RATE_BURST = int(os.environ.get('CEX_RATE_BURST', '1'))  # Requests allowed back to back after an idle spell
+RATE_INCREASE = float(os.environ.get('CEX_RATE_INCREASE', '0.1'))  # Requests/second added per healthy response
+RATE_DECREASE_FACTOR = float(os.environ.get('CEX_RATE_DECREASE_FACTOR', '0.5'))  # Rate multiplier on congestion
+SLOW_RESPONSE_SECONDS = float(os.environ.get('CEX_SLOW_RESPONSE_SECONDS', '8'))  # Slower responses count as congestion
+
+# JSON search API tried before rendering the site in a browser (override to point at a stub server)
+CEX_API_URL = os.environ.get('CEX_API_URL', 'https://wss2.cex.uk.webuy.com/v3/boxes')
+USE_API = os.environ.get('CEX_USE_API', '1') != '0'
+
+# Plain-HTTP fallback when no browser is available - searches run concurrently over pooled connections
+CEX_SEARCH_URL = os.environ.get('CEX_SEARCH_URL', 'https://uk.webuy.com/search')
+FALLBACK_CONCURRENCY = int(os.environ.get('CEX_FALLBACK_CONCURRENCY', '8'))  # Searches in flight at once
+FALLBACK_RETRIES = int(os.environ.get('CEX_FALLBACK_RETRIES', '3'))  # Retries after a 429/5xx or network error
+FALLBACK_BACKOFF_SECONDS = float(os.environ.get('CEX_FALLBACK_BACKOFF_SECONDS', '0.5'))  # First retry delay, doubled each time
+# Without Selenium, lookups that get past the API end in the fallback, so a batch runs enough of them
+# at once to keep CEX_FALLBACK_CONCURRENCY searches in flight
+if 'CEX_LOOKUP_WORKERS' not in os.environ and importlib.util.find_spec('selenium') is None:
+    LOOKUP_WORKERS = max(LOOKUP_WORKERS, FALLBACK_CONCURRENCY)
+
+# Lookup budget - total seconds one lookup may take, from the API request through waiting
+# for a browser to loading and reading the page; lookups that run out report 'budget_exceeded'
+LOOKUP_BUDGET_SECONDS = float(os.environ.get('CEX_LOOKUP_BUDGET_SECONDS', '30'))
+
+# Search page strategy - 'links' reads the rendered result cards first; 'embedded' reads the
+# page's embedded state (Nuxt payload) first and only parses the HTML when that finds nothing
+PAGE_STRATEGY = os.environ.get('CEX_PAGE_STRATEGY', 'links')
+EMBEDDED_MAX_BYTES = int(os.environ.get('CEX_EMBEDDED_MAX_BYTES', str(2_000_000)))  # Larger script blobs are skipped
+
+# Persistent price cache - CeX sell prices change slowly, so results are kept on disk
+CACHE_PATH = os.environ.get('CEX_CACHE_PATH', str(Path.home() / '.cache' / 'cex-price-checker' / 'prices.sqlite3'))
+CACHE_TTL_SECONDS = float(os.environ.get('CEX_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))  # Found prices
+CACHE_NEGATIVE_TTL_SECONDS = float(os.environ.get('CEX_CACHE_NEGATIVE_TTL_SECONDS', '3600'))  # No-match results
+CACHE_MAX_ENTRIES = int(os.environ.get('CEX_CACHE_MAX_ENTRIES', '50000'))
+
+# Catalogue snapshot - search results harvested ahead of time (python -m cex_pricing catalogue),
+# answering lookups locally; entries older than the TTL are looked up on the site instead
+CATALOGUE_PATH = os.environ.get('CEX_CATALOGUE_PATH', str(Path.home() / '.cache' / 'cex-price-checker' / 'catalogue.sqlite3'))
+CATALOGUE_TTL_SECONDS = float(os.environ.get('CEX_CATALOGUE_TTL_SECONDS', str(3 * 24 * 3600)))
+CATALOGUE_MATCH_THRESHOLD = float(os.environ.get('CEX_CATALOGUE_MATCH_THRESHOLD', '0.7'))  # Stricter: not a search for the query
+CATALOGUE_MAX_PAGES = int(os.environ.get('CEX_CATALOGUE_MAX_PAGES', '10'))  # API result pages harvested per term
+USE_CATALOGUE = os.environ.get('CEX_USE_CATALOGUE', '1') != '0'
+
+# Background jobs (the app) - uploads are priced off the page's script thread, at most this many
+# at once, with every job's lookups sharing one pool of CEX_LOOKUP_WORKERS threads
+BACKGROUND_JOBS = int(os.environ.get('CEX_BACKGROUND_JOBS', '2'))
+BACKGROUND_KEEP_JOBS = int(os.environ.get('CEX_BACKGROUND_KEEP_JOBS', '20'))  # Finished jobs kept for their results
+
+# Batch job checkpoints - priced rows are saved as they finish so an interrupted run can resume
+JOBS_PATH = os.environ.get('CEX_JOBS_PATH', str(Path.home() / '.cache' / 'cex-price-checker' / 'jobs.sqlite3'))
+JOBS_TTL_SECONDS = float(os.environ.get('CEX_JOBS_TTL_SECONDS', str(24 * 3600)))  # Idle jobs are forgotten after this
+
+# Instrumentation - per-stage timings and traces of recent lookups, kept in memory
+METRICS_SAMPLES = int(os.environ.get('CEX_METRICS_SAMPLES', '5000'))  # Recent durations per stage used for percentiles
+METRICS_TRACES = int(os.environ.get('CEX_METRICS_TRACES', '1000'))  # Recent lookup traces kept for export
+
+# Matching - 'token' (indexed token-set scoring) or 'difflib' (original character similarity)
+MATCHER = os.environ.get('CEX_MATCHER', 'token')
+MATCH_THRESHOLD = float(os.environ.get('CEX_MATCH_THRESHOLD', '0.5'))  # Token matcher minimum score
@@ -0,0 +1,162 @@
+"""Plain-HTTP search fallback for when no browser is available.
+
+Searches run on an asyncio event loop, at most FALLBACK_CONCURRENCY at once,
+over the shared pooled session. Lookups on every batch worker thread hand
+their search to one long-lived loop, so the limit holds across the whole
+batch. Responses of 429 or 5xx are retried with jittered exponential backoff.
+
+    from cex_pricing.fallback import fetch_cex_prices_fallback
+    results = fetch_cex_prices_fallback(["iPhone 14 128GB", "Xbox Series X"])
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+import requests
+
+from .config import CEX_SEARCH_URL, FALLBACK_BACKOFF_SECONDS, FALLBACK_CONCURRENCY, FALLBACK_RETRIES
+from .governor import BudgetExceededError, current_budget
+from .metrics import current_trace, note_failure, record, use_trace
+from .net import get_http_session, get_rate_limiter
+from .results import BLOCKED, ERROR, NO_RESULTS, UNVERIFIED, LookupResult
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BLOCKED_STATUSES = {403, 429}  # CeX refusing us rather than failing
+MAX_RETRY_DELAY_SECONDS = 30
+REQUEST_TIMEOUT_SECONDS = 10
+PRICE_PATTERN = re.compile(r'£[\d,]+(?:\.\d{2})?')
+HTML_HEADERS = {'Accept': 'text/html,application/xhtml+xml'}
+RESULT_GRACE_SECONDS = 1  # Past the deadline, for a search already cut short to end by it
+
+
+class FallbackEngine:
+    """One event loop, semaphore and worker pool shared by every fallback search in the process."""
+
+    def __init__(self, concurrency=FALLBACK_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='cex-fallback')
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name='cex-fallback-loop', daemon=True).start()
+
+    def search(self, product_names, session=None, search_url=None, deadline=None):
+        """Run searches on the shared loop from any thread, returning LookupResults in input order.
+
+        Raises BudgetExceededError if they haven't finished by the monotonic
+        deadline, e.g. while waiting for other lookups' searches to free a slot.
+        """
+        session = session or get_http_session()
+        search_url = search_url or CEX_SEARCH_URL
+        future = asyncio.run_coroutine_threadsafe(
+            self._gather(product_names, session, search_url, deadline, current_trace()), self._loop
+        )
+        timeout = None if deadline is None else max(0, deadline - time.monotonic()) + RESULT_GRACE_SECONDS
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise BudgetExceededError("Fallback search did not finish within the lookup budget")
+
+    async def _gather(self, product_names, session, search_url, deadline, trace):
+        return await asyncio.gather(*(
+            _search(name, session, search_url, self._semaphore, self._executor, deadline, trace)
+            for name in product_names
+        ))
+
+@lru_cache(maxsize=None)
+def get_fallback_engine():
+    """The process-wide fallback engine, started on first use."""
+    return FallbackEngine()
+
+def fetch_cex_price_fallback(product_name, session=None, search_url=None):
+    """Fallback method using requests when Selenium is not available."""
+    # Retries stop when the next one can't finish within the current lookup's budget
+    return get_fallback_engine().search([product_name], session, search_url, current_budget().deadline)[0]
+
+def fetch_cex_prices_fallback(product_names, concurrency=FALLBACK_CONCURRENCY, session=None, search_url=None):
+    """Search for many products concurrently, returning LookupResults in input order."""
+    return asyncio.run(search_all(product_names, concurrency, session, search_url))
+
+async def search_all(product_names, concurrency=FALLBACK_CONCURRENCY, session=None, search_url=None, deadline=None):
+    """Coroutine behind fetch_cex_prices_fallback(), for callers already running an event loop.
+
+    With a monotonic deadline, requests and retries are cut short to end by it.
+    """
+    session = session or get_http_session()
+    search_url = search_url or CEX_SEARCH_URL
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # requests is blocking, so each request runs on a worker thread; the
+    # semaphore keeps no more than `concurrency` of them busy
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        return await asyncio.gather(*(
+            _search(name, session, search_url, semaphore, executor, deadline) for name in product_names
+        ))
+
+async def _search(product_name, session, search_url, semaphore, executor, deadline=None, trace=None):
+    if not isinstance(product_name, str) or not product_name.strip():
+        return LookupResult.failed(NO_RESULTS, 'empty_name', strategy='fallback')
+    url = f"{search_url}?stext={requests.utils.quote(product_name.strip())}"
+    async with semaphore:
+        response = await _get_with_retry(session, url, executor, deadline, trace)
+    if response is None or response.status_code != 200:
+        reason = f"fallback_http_{response.status_code}" if response is not None else 'fallback_error'
+        with use_trace(trace):
+            note_failure(reason)
+        blocked = response is not None and response.status_code in BLOCKED_STATUSES
+        return LookupResult.failed(BLOCKED if blocked else ERROR, reason, strategy='fallback')
+
+    # Look for any price patterns in the HTML (limited success due to JavaScript)
+    prices = PRICE_PATTERN.findall(response.text)
+    if prices:
+        # The first price on the page, not matched to any product - reported, never counted as a match
+        return LookupResult("Search results found (fallback mode)", prices[0].replace('£', ''), url,
+                            status=UNVERIFIED, strategy='fallback')
+    return LookupResult("No prices found in fallback mode", None, url, status=NO_RESULTS, strategy='fallback')
+
+async def _get_with_retry(session, url, executor, deadline=None, trace=None):
+    """GET url, retrying 429/5xx responses and network errors. None if every attempt failed."""
+    loop = asyncio.get_running_loop()
+    response = None
+    for attempt in range(FALLBACK_RETRIES + 1):
+        # Timings land in the trace of the lookup that asked, whichever thread runs the request
+        response = await loop.run_in_executor(executor, _get, session, url, deadline, trace)
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return response
+        if attempt < FALLBACK_RETRIES:
+            delay = _retry_delay(attempt, response)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                break
+            await asyncio.sleep(delay)
+    return response
+
+def _get(session, url, deadline, trace):
+    """One rate-limited GET, or None on a network error. Raises BudgetExceededError past the deadline."""
+    limiter = get_rate_limiter()
+    with use_trace(trace):
+        try:
+            limiter.wait(url, deadline)
+            started = time.monotonic()
+            timeout = REQUEST_TIMEOUT_SECONDS
+            if deadline is not None:
+                timeout = max(0.1, min(timeout, deadline - started))
+            response = session.get(url, headers=HTML_HEADERS, timeout=timeout)
+            elapsed = time.monotonic() - started
+            record('fallback_request', elapsed)
+            limiter.record(url, response.status_code, elapsed)
+            return response
+        except requests.RequestException:
+            limiter.record(url, error=True)
+            return None
+
+def _retry_delay(attempt, response):
+    """Full-jitter exponential backoff, never shorter than a 429's Retry-After."""
+    delay = random.uniform(0, FALLBACK_BACKOFF_SECONDS * 2 ** attempt)
+    retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+    if retry_after.isdigit():
+        delay = max(delay, int(retry_after))
+    return min(delay, MAX_RETRY_DELAY_SECONDS)
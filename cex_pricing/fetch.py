@@ -0,0 +1,303 @@
+"""Single-product CeX lookups: JSON API, Selenium and plain-requests paths."""
+
+import logging
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
+
+import requests
+
+from .api import search_cex_api
+from .browser import (
+    PAGE_LOAD_SECONDS, SELENIUM_AVAILABLE, DriverUnavailableError, get_driver_pool, get_tab_scheduler, page_weight,
+    wait_for_page_ready
+)
+from .cache import get_price_cache
+from .catalogue import get_catalogue
+from .config import PAGE_STRATEGY, TABS_PER_BROWSER, USE_API, USE_CATALOGUE
+from .fallback import fetch_cex_price_fallback
+from .governor import BudgetExceededError, current_budget, lookup_budget
+from .matching import clean_search_term, score_best_match
+from .metrics import lookup_trace, note_failure, record, record_page_weight, timed
+from .net import get_rate_limiter
+from .parsing import RESULTS_REGION, extract_embedded_cards, extract_product_cards, looks_blocked, parse_html
+from .results import BLOCKED, BUDGET_EXCEEDED, ERROR, NO_MATCH, NO_RESULTS, UNVERIFIED, LookupResult, as_result
+
+if SELENIUM_AVAILABLE:
+    from selenium.webdriver.common.by import By
+
+logger = logging.getLogger(__name__)
+
+HARVEST_GRACE_SECONDS = 5  # Time a tab harvested at the deadline gets to be read
+
+
+def _failed(status, reason, **fields):
+    """Note why the current lookup found nothing and return it as a result."""
+    note_failure(reason)
+    return LookupResult.failed(status, reason, **fields)
+
+def fetch_cex_price(product_name):
+    """Search CeX and return the best matched product and its sell price, as a LookupResult."""
+    if not isinstance(product_name, str) or not product_name.strip():
+        return LookupResult.failed(NO_RESULTS, 'empty_name')
+    
+    started = time.perf_counter()
+    cache = get_price_cache()
+    cached = cache.get(product_name)
+    if cached is not None:
+        cached.latency = time.perf_counter() - started
+        return cached
+    
+    if USE_CATALOGUE:
+        with timed('catalogue'):
+            snapshot = get_catalogue().lookup(product_name)
+        if snapshot is not None:
+            snapshot.latency = time.perf_counter() - started
+            return snapshot
+    
+    with lookup_trace(product_name) as trace:
+        result = trace['result'] = lookup_cex_price(product_name)
+    if not result.retryable:
+        cache.put(product_name, result)  # A timeout or block says nothing about CeX's stock, so it isn't kept
+    return result
+
+def lookup_cex_price(product_name):
+    """Search CeX directly, bypassing the price cache, within one lookup's time budget.
+
+    A lookup that runs out of time before finding anything ends with status
+    'budget_exceeded' rather than as a plain no-match.
+    """
+    started = time.perf_counter()
+    with lookup_budget() as budget:
+        try:
+            result = _search_cex(product_name)
+        except BudgetExceededError:
+            result = _failed(BUDGET_EXCEEDED, BUDGET_EXCEEDED)
+    if result.status == ERROR and budget.expired():
+        # Timed out rather than broken: the page or a browser never came in time
+        result = _failed(BUDGET_EXCEEDED, BUDGET_EXCEEDED, strategy=result.strategy)
+    result.latency = time.perf_counter() - started
+    return result
+
+def _search_cex(product_name):
+    # Fast path: the JSON search API answers in well under a second without a browser
+    api_result = None
+    if USE_API:
+        api_result = fetch_cex_price_api(product_name)
+        if api_result.match is not None:
+            return api_result
+    
+    # Try Selenium first if available, fallback to requests method
+    if SELENIUM_AVAILABLE:
+        result = fetch_cex_price_selenium(product_name)
+    else:
+        result = as_result(fetch_cex_price_fallback(product_name))
+    if (result.retryable or result.status == UNVERIFIED) and api_result is not None and not api_result.retryable:
+        return api_result  # The site gave nothing better than a guess, and the API's no-match still stands
+    return result
+
+def fetch_cex_price_api(product_name, session=None, api_url=None):
+    """Search CeX's JSON search API over plain HTTP - no browser needed."""
+    if not product_name or not product_name.strip():
+        return LookupResult.failed(NO_RESULTS, 'empty_name', strategy='api')
+    
+    candidates, _ = search_cex_api(clean_search_term(product_name), session, api_url)
+    if candidates is None:
+        # The request failed; search_cex_api noted why
+        return LookupResult.failed(ERROR, 'api_error', strategy='api')
+    if not candidates:
+        return _failed(NO_RESULTS, 'api_no_results', strategy='api')
+    with timed('match'):
+        (match, price, url), score = score_best_match(product_name, candidates)
+    if match is None:
+        return _failed(NO_MATCH, 'api_no_match', strategy='api', score=score)
+    return LookupResult(match, price, url, score=score, strategy='api')
+
+def fetch_cex_price_selenium(product_name):
+    """Search CeX using Selenium (preferred method)."""
+    if not product_name or not product_name.strip():
+        return LookupResult.failed(NO_RESULTS, 'empty_name')
+    
+    budget = current_budget()
+    try:
+        if TABS_PER_BROWSER > 1:
+            # Share a browser with other lookups, each loading in its own tab
+            harvest = partial(_harvest_tab, product_name=product_name)
+            future = get_tab_scheduler().submit(search_url_for(product_name), harvest, budget.deadline)
+            try:
+                return future.result(timeout=budget.remaining() + HARVEST_GRACE_SECONDS)
+            except FutureTimeoutError:
+                future.cancel()  # Only takes effect while it is still queued
+                raise BudgetExceededError("Tab was not harvested within the lookup budget")
+        with get_driver_pool().lease(budget.deadline) as driver:
+            return search_cex_with_driver(driver, product_name)
+    except BudgetExceededError:
+        raise
+    except DriverUnavailableError:
+        return _failed(ERROR, 'driver_unavailable')
+    except Exception as e:
+        return _failed(ERROR, f"browser_error:{type(e).__name__}")
+
+def search_url_for(product_name):
+    """CeX search page URL for a product."""
+    return f"https://uk.webuy.com/search?stext={requests.utils.quote(clean_search_term(product_name))}"
+
+def _harvest_tab(driver, fired, deadline, product_name):
+    """Pick the best match from a search page loaded in a shared browser's tab."""
+    failure = None
+    if fired == 'timeout':
+        failure = 'ready_timeout'
+        note_failure(failure)
+    weight = page_weight(driver)
+    if weight is not None:
+        record_page_weight(*weight)
+    return match_search_page(driver, product_name, driver.page_source, deadline, failure)
+
+def search_cex_with_driver(driver, product_name):
+    """Run a CeX search in an already running browser and pick the best match."""
+    search_term = clean_search_term(product_name)
+    search_url = search_url_for(product_name)
+    budget = current_budget()
+    deadline = budget.deadline
+    
+    limiter = get_rate_limiter()
+    navigated = False
+    failure = None  # Why the page didn't finish loading
+    limiter.wait(search_url, deadline)  # Raises BudgetExceededError rather than wait past the deadline
+    try:
+        # A slow page load can't outlast the lookup budget
+        driver.set_page_load_timeout(max(0.1, budget.timeout(PAGE_LOAD_SECONDS)))
+        started = time.monotonic()
+        with timed('navigate'):
+            driver.get(search_url)
+        navigated = True
+        limiter.record(search_url, latency=time.monotonic() - started)
+        
+        # Wait for results to render (or the page to settle) within the lookup budget
+        with timed('ready_wait'):
+            fired = wait_for_page_ready(driver, deadline)
+        logger.debug("Page ready for %r: %s", search_term, fired)
+        if fired == 'timeout':
+            failure = 'ready_timeout'
+            note_failure(failure)
+        weight = page_weight(driver)
+        if weight is not None:
+            record_page_weight(*weight)
+        page_source = driver.page_source
+        
+    except Exception as nav_error:
+        if not navigated:
+            limiter.record(search_url, error=True)
+        failure = f"navigation_error:{type(nav_error).__name__}"
+        note_failure(failure)
+        page_source = driver.page_source
+    
+    return match_search_page(driver, product_name, page_source, deadline, failure)
+
+def search_page_cards(page_source):
+    """(soup, product links, priced cards) of a search page, parsing only its results region when that is enough."""
+    # Parse only the results region first - header, filters and script blobs are skipped
+    soup = parse_html(page_source, scope='results', parse_only=RESULTS_REGION)
+    product_links, cards = _linked_cards(soup)
+    if not cards:
+        # Results region not found, or a card wrapper without a result/product class was
+        # skipped and took its links' prices with it - the whole page is needed
+        soup = parse_html(page_source)
+        product_links, cards = _linked_cards(soup)
+    return soup, product_links, cards
+
+def _linked_cards(soup):
+    with timed('strategy_a'):
+        product_links = soup.select('a[href*="/product-detail"]')
+    if not product_links:
+        return product_links, []
+    with timed('extract_cards'):
+        return product_links, extract_product_cards(soup, product_links)
+
+def match_search_page(driver, product_name, page_source, deadline, failure=None):
+    """Pick the best match from a loaded search page, clicking through it as a last resort.
+
+    `failure` is why the page didn't finish loading, if it didn't. Finding
+    nothing on a page that did load means CeX has no results.
+    """
+    cards = []
+    product_links = []
+    strategy = None  # The strategy that found the results
+    if PAGE_STRATEGY == 'embedded':
+        # Strategy B first: when the embedded state has the results no HTML tree is built at all
+        with timed('strategy_b'):
+            cards = extract_embedded_cards(page_source)
+        strategy = 'strategy_b'
+    
+    if not cards:
+        # Strategy A: Find product links and their associated prices
+        soup, product_links, cards = search_page_cards(page_source)
+        strategy = 'strategy_a'
+    
+    # Strategy B: Read the results from the JSON state embedded in the page (Nuxt/Vue)
+    if not product_links and not cards and PAGE_STRATEGY != 'embedded':
+        with timed('strategy_b'):
+            cards = extract_embedded_cards(page_source)
+        strategy = 'strategy_b'
+    
+    # Try alternative link patterns if main pattern fails
+    if not product_links and not cards:
+        started = time.perf_counter()
+        patterns_to_try = [
+            'a[href*="product"]',
+            'a[href*="buy"]', 
+            'a[href*="sell"]',
+            'a[href*="item"]',
+            'a[href*="detail"]',
+            'a[class*="product"]',
+            'a[class*="item"]'
+        ]
+        
+        for pattern in patterns_to_try:
+            alt_links = soup.select(pattern)
+            if alt_links:
+                product_links = alt_links
+                strategy = 'alt_selectors'
+                break
+        record('alt_selectors', time.perf_counter() - started)
+    
+    if not product_links and not cards:
+        # Try clicking the first product card or category and re-parse
+        started = time.perf_counter()
+        try:
+            elements = driver.find_elements(By.CSS_SELECTOR, 'a, div')
+            for el in elements[:50]:
+                if time.monotonic() >= deadline:
+                    break  # Lookup budget spent
+                try:
+                    text = el.text.strip().lower()
+                    if any(k in text for k in ['results', 'iphone', 'product', 'category']):
+                        el.click()
+                        wait_for_page_ready(driver, deadline)
+                        page_source = driver.page_source
+                        soup = parse_html(page_source, scope='click-through')
+                        product_links = soup.select('a[href*="/product-detail"]')
+                        if product_links:
+                            strategy = 'click_through'
+                            break
+                except Exception:
+                    continue
+        except Exception:
+            pass
+        record('click_through', time.perf_counter() - started)
+    
+    if not product_links and not cards:
+        if looks_blocked(page_source):
+            return _failed(BLOCKED, 'blocked_page')
+        if failure:
+            return LookupResult.failed(ERROR, failure)  # Already noted
+        return _failed(NO_RESULTS, 'no_results')
+    
+    if strategy in ('alt_selectors', 'click_through'):
+        with timed('extract_cards'):
+            cards = extract_product_cards(soup, product_links)
+    with timed('match'):
+        (match, price, url), score = score_best_match(product_name, cards)
+    if match is None:
+        return _failed(NO_MATCH, 'no_match', strategy=strategy, score=score)
+    return LookupResult(match, price, url, score=score, strategy=strategy)
@@ -0,0 +1,198 @@
+"""Resource limits: a time budget per lookup and the memory used by browsers.
+
+A lookup runs inside lookup_budget(), and every stage under it sizes its
+waits and timeouts from current_budget() so the whole lookup ends on time.
+Browser memory is read from /proc, and the container's limit from its
+cgroup, so the driver pool can stay within what the container allows.
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from .config import (
+    BROWSER_MAX_RSS_MB, BROWSER_MEMORY_MB, LOOKUP_BUDGET_SECONDS, MEMORY_HIGH_WATERMARK, MEMORY_RESERVE_MB
+)
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# cgroup v2, then v1: (limit file, usage file, stats file, reclaimable page cache counted in usage)
+CGROUP_MEMORY_FILES = [
+    ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current', '/sys/fs/cgroup/memory.stat', 'inactive_file'),
+    ('/sys/fs/cgroup/memory/memory.limit_in_bytes', '/sys/fs/cgroup/memory/memory.usage_in_bytes',
+     '/sys/fs/cgroup/memory/memory.stat', 'total_inactive_file')
+]
+UNLIMITED_BYTES = 1 << 60  # cgroup v1 reports "no limit" as a huge number
+
+_local = threading.local()  # .budget: the LookupBudget of the lookup running on this thread
+
+
+class BudgetExceededError(TimeoutError):
+    """A lookup ran out of its time budget before it could finish."""
+
+class LookupBudget:
+    """Seconds a lookup may take in total, counted from when it starts."""
+
+    def __init__(self, seconds=LOOKUP_BUDGET_SECONDS):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.deadline
+
+    def timeout(self, limit):
+        """A stage's own timeout, cut short to what is left of the budget."""
+        return min(limit, self.remaining())
+
+@contextmanager
+def lookup_budget(seconds=LOOKUP_BUDGET_SECONDS):
+    """Run the enclosed lookup under a fresh time budget."""
+    outer, _local.budget = getattr(_local, 'budget', None), LookupBudget(seconds)
+    try:
+        yield _local.budget
+    finally:
+        _local.budget = outer
+
+def current_budget():
+    """The budget of the lookup running on this thread, or a fresh one outside any lookup."""
+    budget = getattr(_local, 'budget', None)
+    return budget if budget is not None else LookupBudget()
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None
+
+def _read_stat(path, key):
+    """One counter from a cgroup memory.stat file, or 0 if it can't be read."""
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(' ')
+                if name == key:
+                    return int(value)
+    except (OSError, ValueError):
+        pass
+    return 0
+
+def memory_limit():
+    """(limit, usage) in bytes for this container's cgroup, or for the machine without one.
+
+    A cgroup's usage counts page cache the kernel only reclaims near the
+    limit (e.g. browser disk caches, SQLite writes), so its inactive part
+    is left out.
+    """
+    for limit_path, usage_path, stat_path, inactive_key in CGROUP_MEMORY_FILES:
+        limit = _read_int(limit_path)
+        if limit is not None and limit < UNLIMITED_BYTES:
+            usage = _read_int(usage_path) or 0
+            return limit, max(0, usage - _read_stat(stat_path, inactive_key))
+    meminfo = {}
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                meminfo[key] = int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None, None
+    if 'MemTotal' not in meminfo:
+        return None, None
+    return meminfo['MemTotal'], meminfo['MemTotal'] - meminfo.get('MemAvailable', meminfo['MemTotal'])
+
+def browser_capacity(requested, per_browser_mb=BROWSER_MEMORY_MB, reserve_mb=MEMORY_RESERVE_MB):
+    """How many of `requested` browsers fit in memory, keeping `reserve_mb` for the app itself (at least 1)."""
+    limit, _ = memory_limit()
+    if limit is None or per_browser_mb <= 0:
+        return requested
+    fits = int((limit / MB - reserve_mb) // per_browser_mb)
+    return max(1, min(requested, fits))
+
+def memory_pressure(watermark=MEMORY_HIGH_WATERMARK):
+    """Whether the container is using more than `watermark` of its memory limit."""
+    limit, usage = memory_limit()
+    return bool(limit) and usage >= watermark * limit
+
+def _children(pid):
+    """Direct child PIDs, from the kernel's list if it has one, else by scanning /proc."""
+    children = set()
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                children.update(int(child) for child in f.read().split())
+        return children
+    except (OSError, ValueError):
+        pass
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name can contain spaces, so fields are counted from its closing bracket
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if parent == pid:
+            children.add(int(entry))
+    return children
+
+def process_tree(pid):
+    """pid and all of its descendants that are still running."""
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        if os.path.exists(f'/proc/{current}'):
+            tree.append(current)
+            pending.extend(_children(current))
+    return tree
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and its descendants (e.g. a driver and its browser)."""
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for member in process_tree(pid):
+        try:
+            with open(f'/proc/{member}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+def kill_process_tree(pids):
+    """SIGKILL whatever is left of a process tree, e.g. a browser that ignored quit()."""
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            continue
+
+def driver_pid(driver):
+    """PID of the chromedriver/geckodriver process behind a driver (the browser is its child), if known."""
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+def browser_rss(driver):
+    """Resident memory in bytes of a driver's processes, or None if they can't be found."""
+    pid = driver_pid(driver)
+    return process_tree_rss(pid) if pid else None
+
+def browser_over_limit(driver, max_rss_mb=BROWSER_MAX_RSS_MB):
+    """Why a browser should be recycled rather than reused ('rss' or 'memory_pressure'), or None."""
+    rss = browser_rss(driver)
+    if rss is not None and max_rss_mb > 0 and rss > max_rss_mb * MB:
+        logger.warning("Recycling a browser using %.0f MB (limit %d MB)", rss / MB, max_rss_mb)
+        return 'rss'
+    if rss is not None and memory_pressure():
+        logger.warning("Recycling a browser: container memory is above %.0f%% of its limit",
+                       MEMORY_HIGH_WATERMARK * 100)
+        return 'memory_pressure'
+    return None
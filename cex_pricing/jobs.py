@@ -0,0 +1,85 @@
+"""Checkpointed batch jobs that can resume after a crash or rerun."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .config import JOBS_PATH, JOBS_TTL_SECONDS
+from .results import LookupResult
+
+
+def job_id_for(data):
+    """Stable job ID for an input file's bytes, so re-uploading the same file resumes its job."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+def file_job_id(path, chunk_size=1 << 20):
+    """job_id_for() of a file on disk, hashed without reading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+class JobCheckpoint:
+    """Results of the rows already priced for one job, saved as each row finishes.
+
+    Rows are keyed on their position in the input. Jobs not touched for `ttl`
+    seconds are dropped so a file uploaded again next week is priced afresh.
+    """
+
+    def __init__(self, job_id, path=JOBS_PATH, ttl=JOBS_TTL_SECONDS):
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, created_at REAL NOT NULL, '
+            'updated_at REAL NOT NULL)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS job_rows (job_id TEXT NOT NULL, row_index INTEGER NOT NULL, '
+            'match TEXT, price TEXT, url TEXT, status TEXT, PRIMARY KEY (job_id, row_index))'
+        )
+        now = time.time()
+        with self._lock:
+            stale = [job for job, in self._db.execute('SELECT job_id FROM jobs WHERE updated_at < ?', (now - ttl,))]
+            for job in stale:
+                self._delete(job)
+            self._db.execute('INSERT OR IGNORE INTO jobs (job_id, created_at, updated_at) VALUES (?, ?, ?)',
+                             (job_id, now, now))
+            self.completed = {
+                index: LookupResult(match, price, url, status=status, strategy='checkpoint')
+                for index, match, price, url, status in self._db.execute(
+                    'SELECT row_index, match, price, url, status FROM job_rows WHERE job_id = ?', (job_id,)
+                )
+            }
+        self.resumed = len(self.completed)
+
+    def record(self, index, result):
+        """Save the lookup result for input row `index`."""
+        match, price, url = result
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO job_rows (job_id, row_index, match, price, url, status) '
+                             'VALUES (?, ?, ?, ?, ?, ?)',
+                             (self.job_id, index, match, price, url, getattr(result, 'status', None)))
+            self._db.execute('UPDATE jobs SET updated_at = ? WHERE job_id = ?', (time.time(), self.job_id))
+            self.completed[index] = result
+
+    def clear(self):
+        """Forget the job's saved rows so the next run prices everything again."""
+        with self._lock:
+            self._delete(self.job_id)
+            now = time.time()
+            self._db.execute('INSERT INTO jobs (job_id, created_at, updated_at) VALUES (?, ?, ?)',
+                             (self.job_id, now, now))
+            self.completed = {}
+            self.resumed = 0
+
+    def _delete(self, job_id):
+        self._db.execute('DELETE FROM job_rows WHERE job_id = ?', (job_id,))
+        self._db.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
@@ -0,0 +1,188 @@
+"""Search-term cleaning and matching of a product name against CeX titles."""
+
+import difflib
+import math
+import re
+from collections import Counter, defaultdict
+
+from .config import MATCHER, MATCH_THRESHOLD
+
+
+def clean_search_term(product_name):
+    """Simplify a product name into the term sent to the CeX search."""
+    search_term = product_name.strip()
+    # Remove detailed descriptors for initial search
+    return re.sub(r'\s*[,w]\/.*$', '', search_term)
+
+def normalize_query(product_name):
+    """Canonical form of a product name, so trivially different spellings share a lookup."""
+    return ' '.join(clean_search_term(product_name).lower().split())
+
+def score_best_match(product_name, candidates):
+    """The (title, price, url) candidate most similar to product_name, and its score.
+
+    The score is that of the best candidate even when it falls below the
+    threshold and Nones are returned; None if nothing could be scored.
+    """
+    matcher = MATCHERS.get(MATCHER, TokenMatcher)()
+    for title, price_clean, url in priced_candidates(candidates):
+        matcher.add(title, price_clean, url)
+    return matcher.best_scored(product_name)
+
+def priced_candidates(candidates):
+    """The (title, price, url) candidates whose price is a positive number."""
+    for title, price_clean, url in candidates:
+        # Validate price format
+        try:
+            price_value = float(price_clean)
+        except (TypeError, ValueError):
+            continue  # Invalid price, skip
+        if price_value > 0:
+            yield title, price_clean, url
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+# Words that name a different model of the same product line ("iPhone 14 Plus", "PS5 Slim")
+VARIANT_WORDS = frozenset({'pro', 'plus', 'max', 'mini', 'ultra', 'lite', 'slim', 'oled'})
+_STORAGE_RE = re.compile(r'\b(\d+(?:\.\d+)?)\s*(gb|tb)\b')
+
+def tokenize(text):
+    """Lower-case word tokens, with storage sizes joined up ("128 GB" -> "128gb")."""
+    return set(_TOKEN_RE.findall(_STORAGE_RE.sub(r'\1\2', text.lower())))
+
+def _hard_attributes(tokens):
+    """Split out tokens that must agree between query and title.
+
+    Storage sizes ("256gb") and anything else containing a digit - model
+    numbers and generations such as "14", "s23", "m2" or "2nd".
+    """
+    storage = {t for t in tokens if _STORAGE_RE.fullmatch(t)}
+    numbered = {t for t in tokens if t not in storage and any(c.isdigit() for c in t)}
+    return storage, numbered
+
+class DifflibMatcher:
+    """Original matcher: character similarity of every title, 30% minimum."""
+
+    threshold = 0.3
+
+    def __init__(self):
+        self._entries = []
+
+    def add(self, title, price, url):
+        self._entries.append((title, price, url))
+
+    def best_match(self, product_name):
+        return self.best_scored(product_name)[0]
+
+    def best_scored(self, product_name):
+        best = (None, None, None)
+        highest_ratio = 0
+        for entry in self._entries:
+            # Similarity check to pick best match
+            ratio = difflib.SequenceMatcher(None, product_name.lower(), entry[0].lower()).ratio()
+            if ratio > highest_ratio:
+                highest_ratio = ratio
+                best = entry
+        # Only return results if we have a reasonable match (>= 30% similarity)
+        score = highest_ratio if self._entries else None
+        return (best if highest_ratio >= self.threshold else (None, None, None)), score
+
+    def best_matches(self, product_names):
+        return [self.best_match(name) for name in product_names]
+
+class TokenMatcher:
+    """Token-set matcher over an inverted index of candidate titles.
+
+    Titles are tokenized once when added. A query is only scored against
+    titles sharing enough of its tokens, so cost grows with the number of
+    plausible candidates rather than the catalogue size. Scores blend query
+    coverage with Dice similarity, then reward agreeing and penalise
+    conflicting hard attributes (storage size, model numbers, generations).
+    A variant word present on only one side rules the title out.
+    """
+
+    min_overlap = 0.34  # Fraction of query tokens a title must share to be scored
+    storage_bonus = 0.15
+    storage_penalty = 0.5
+    numbered_penalty = 0.35
+
+    def __init__(self, threshold=None):
+        self.threshold = MATCH_THRESHOLD if threshold is None else threshold
+        self._entries = []  # (title, price, url)
+        self._tokens = []  # Token set per entry
+        self._storage = []  # Storage sizes per entry, worked out once rather than per score
+        self._index = defaultdict(list)  # token -> entry ids
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, title, price, url):
+        entry_id = len(self._entries)
+        tokens = tokenize(title)
+        self._entries.append((title, price, url))
+        self._tokens.append(tokens)
+        self._storage.append(_hard_attributes(tokens)[0])
+        for token in tokens:
+            self._index[token].append(entry_id)
+
+    def score(self, query_tokens, title_tokens, query_attributes=None, title_storage=None):
+        """Similarity in [0, 1] between a tokenized query and title.
+
+        The query's _hard_attributes() and the title's storage sizes are worked
+        out here unless the caller already has them.
+        """
+        if not query_tokens or not title_tokens:
+            return 0.0
+        if (query_tokens ^ title_tokens) & VARIANT_WORDS:
+            # "iPhone 14" is not an "iPhone 14 Pro", however well the other words and the storage agree
+            return 0.0
+        shared = len(query_tokens & title_tokens)
+        coverage = shared / len(query_tokens)
+        dice = 2 * shared / (len(query_tokens) + len(title_tokens))
+        score = 0.6 * coverage + 0.4 * dice
+        
+        query_storage, query_numbered = query_attributes or _hard_attributes(query_tokens)
+        if title_storage is None:
+            title_storage, _ = _hard_attributes(title_tokens)
+        if query_storage and title_storage:
+            # Right model in the wrong capacity is a different product
+            score += self.storage_bonus if query_storage & title_storage else -self.storage_penalty
+        score -= self.numbered_penalty * len(query_numbered - title_tokens)
+        return max(0.0, min(1.0, score))
+
+    def _scored(self, query_tokens):
+        shared = Counter()
+        for token in query_tokens:
+            shared.update(self._index.get(token, ()))
+        min_shared = max(1, math.ceil(len(query_tokens) * self.min_overlap))
+        query_attributes = _hard_attributes(query_tokens)
+        for entry_id, count in shared.items():
+            if count >= min_shared:
+                score = self.score(query_tokens, self._tokens[entry_id], query_attributes, self._storage[entry_id])
+                yield score, entry_id
+
+    def best_match(self, product_name):
+        """Best (title, price, url) for product_name, or Nones below the threshold."""
+        return self.best_scored(product_name)[0]
+
+    def best_scored(self, product_name):
+        """best_match() and the best score, which is None if no title shared enough tokens."""
+        # Ties go to the earliest title added, i.e. the first on the page, as the old matcher's strict > did
+        best_score, best_id = max(self._scored(tokenize(product_name)), key=lambda scored: (scored[0], -scored[1]),
+                                  default=(None, None))
+        if best_id is None or best_score < self.threshold:
+            return (None, None, None), best_score
+        return self._entries[best_id], best_score
+
+    def best_matches(self, product_names):
+        """Score many queries against the indexed titles, tokenizing each distinct query once."""
+        memo = {}
+        for name in product_names:
+            if name not in memo:
+                memo[name] = self.best_match(name)
+        return [memo[name] for name in product_names]
+
+MATCHERS = {
+    'token': TokenMatcher,
+    'difflib': DifflibMatcher
+}
+    
@@ -0,0 +1,230 @@
+"""Per-stage lookup timings, failure reasons and traces of recent lookups.
+
+Code around each stage of a lookup is wrapped in timed():
+
+    with timed('navigate'):
+        driver.get(search_url)
+
+and a whole lookup in lookup_trace(), which collects its stages and the
+reason it failed (noted with note_failure()) into one trace.
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+from .config import METRICS_SAMPLES, METRICS_TRACES
+from .parsing import parse_timing_hooks
+from .results import LookupResult
+
+# Upper bounds of the histogram buckets, in seconds
+HISTOGRAM_BOUNDS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 60]
+# Bucket bounds for the weight of each search page loaded in a browser
+PAGE_WEIGHT_BOUNDS = {
+    'page_requests': [1, 5, 10, 20, 50, 100, 200, 500],
+    'page_bytes': [10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000]
+}
+
+_local = threading.local()  # .trace: the lookup trace being recorded on this thread
+
+
+class Histogram:
+    """Bucketed counts of one stage's durations (or other values), plus recent samples for percentiles."""
+
+    def __init__(self, samples=METRICS_SAMPLES, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket is everything larger
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=samples)
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def percentile(self, fraction):
+        """Value below which `fraction` of the recent samples fall (nearest rank)."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'max': self.max
+        }
+
+    def buckets(self):
+        return dict(zip([str(bound) for bound in self.bounds] + ['+inf'], self.counts))
+
+class LookupMetrics:
+    """Stage histograms, failure counts and recent traces shared by every lookup."""
+
+    def __init__(self, samples=METRICS_SAMPLES, traces=METRICS_TRACES):
+        self.samples = samples
+        self.stages = {}  # stage -> Histogram
+        self.page_weight = {name: Histogram(samples, bounds) for name, bounds in PAGE_WEIGHT_BOUNDS.items()}
+        self.failures = Counter()  # Category of each lookup that found nothing
+        self.traces = deque(maxlen=traces)
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        """Add one duration for a stage."""
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(self.samples)
+            histogram.add(seconds)
+
+    def record_page(self, requests_made, transferred):
+        """Add the requests made and bytes transferred by one browser page load."""
+        with self._lock:
+            self.page_weight['page_requests'].add(requests_made)
+            self.page_weight['page_bytes'].add(transferred)
+
+    def finish_trace(self, trace):
+        with self._lock:
+            if trace['failure']:
+                self.failures[trace['failure']] += 1
+            self.traces.append(trace)
+
+    def summary(self):
+        """p50/p95/mean/max seconds and sample count per stage, slowest p95 first."""
+        with self._lock:
+            rows = {stage: histogram.summary() for stage, histogram in self.stages.items()}
+        return dict(sorted(rows.items(), key=lambda item: -(item[1]['p95'] or 0)))
+
+    def page_weight_summary(self):
+        """Requests and bytes per browser page load, or None before any page was measured."""
+        with self._lock:
+            if not self.page_weight['page_requests'].count:
+                return None
+            return {name: histogram.summary() for name, histogram in self.page_weight.items()}
+
+    def failure_counts(self):
+        """Lookups that found nothing, by reason, most common first."""
+        with self._lock:
+            return dict(self.failures.most_common())
+
+    def export(self):
+        """Everything recorded so far as a JSON-serialisable dict."""
+        with self._lock:
+            histograms = {
+                stage: dict(histogram.summary(), buckets=histogram.buckets())
+                for stage, histogram in self.stages.items()
+            }
+            return {
+                'started_at': self.started_at,
+                'exported_at': time.time(),
+                'stages': histograms,
+                'page_weight': {
+                    name: dict(histogram.summary(), buckets=histogram.buckets())
+                    for name, histogram in self.page_weight.items()
+                },
+                'failures': dict(self.failures.most_common()),
+                'traces': list(self.traces)
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.export(), **kwargs)
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.page_weight = {name: Histogram(self.samples, bounds) for name, bounds in PAGE_WEIGHT_BOUNDS.items()}
+            self.failures.clear()
+            self.traces.clear()
+            self.started_at = time.time()
+
+@lru_cache(maxsize=None)
+def get_metrics():
+    """Lookup metrics shared by every lookup in this process."""
+    return LookupMetrics()
+
+def record(stage, seconds):
+    """Record a stage duration in the shared metrics and the current thread's trace."""
+    get_metrics().record(stage, seconds)
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace['stages'].append([stage, round(seconds, 6)])
+
+@contextmanager
+def timed(stage):
+    """Time the enclosed block as `stage`, whether or not it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started)
+
+def record_page_weight(requests_made, transferred):
+    """Record the weight of a browser page load in the shared metrics and the current trace."""
+    get_metrics().record_page(requests_made, transferred)
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace['page'] = {'requests': requests_made, 'bytes': transferred}
+
+def note_failure(category):
+    """Note why the current lookup is going wrong; the last note made is the one counted."""
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace['notes'].append(category)
+
+@contextmanager
+def lookup_trace(product_name):
+    """Collect the stages of one lookup into a trace.
+
+    The block sets trace['result'] to the lookup's result, which the trace
+    keeps as a dict of its fields. A lookup without a match is counted under
+    the last note_failure() category, or 'no_match' if none was noted.
+    """
+    trace = {'product': product_name, 'started_at': time.time(), 'stages': [], 'notes': [],
+             'result': None, 'failure': None}
+    outer, _local.trace = getattr(_local, 'trace', None), trace
+    started = time.perf_counter()
+    try:
+        yield trace
+    except Exception as error:
+        trace['notes'].append(f"exception:{type(error).__name__}")
+        raise
+    finally:
+        _local.trace = outer
+        trace['seconds'] = round(time.perf_counter() - started, 6)
+        result = trace['result']
+        if result is None or result[0] is None:
+            trace['failure'] = trace['notes'][-1] if trace['notes'] else 'no_match'
+        if isinstance(result, LookupResult):
+            trace['result'] = result.as_dict()
+        get_metrics().record('lookup', trace['seconds'])
+        get_metrics().finish_trace(trace)
+
+def current_trace():
+    """The lookup trace being recorded on this thread, if any."""
+    return getattr(_local, 'trace', None)
+
+@contextmanager
+def use_trace(trace):
+    """Record into `trace` on this thread, for work done on behalf of a lookup running elsewhere."""
+    outer, _local.trace = getattr(_local, 'trace', None), trace
+    try:
+        yield trace
+    finally:
+        _local.trace = outer
+
+def _record_parse(scope, seconds, page_bytes):
+    record(f'parse_{scope}', seconds)
+
+parse_timing_hooks.append(_record_parse)
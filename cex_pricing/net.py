@@ -0,0 +1,142 @@
+"""Shared HTTP plumbing: a pooled session and per-host rate limiting."""
+
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import requests
+
+from .config import (
+    FALLBACK_CONCURRENCY,
+    LOOKUP_WORKERS,
+    MAX_REQUESTS_PER_SECOND,
+    MIN_REQUESTS_PER_SECOND,
+    RATE_BURST,
+    RATE_DECREASE_FACTOR,
+    RATE_INCREASE,
+    REQUESTS_PER_SECOND,
+    SLOW_RESPONSE_SECONDS
+)
+from .governor import BudgetExceededError, current_budget
+from .metrics import record
+
+
+class _Bucket:
+    """Token bucket for one host, refilled at an adjustable rate."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst  # Goes negative while requests are queued for future tokens
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class AdaptiveRateLimiter:
+    """Per-host token buckets whose rate adapts to how CeX is responding.
+
+    Every lookup path calls wait() before a request and record() after it.
+    Each healthy response adds `increase` requests/second to the host's rate;
+    a throttled, failed or slow one multiplies it by `decrease_factor` (at
+    most once per `cooldown` seconds, so a burst of 429s counts once). The
+    rate stays between `min_rate` and `max_rate`.
+    """
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND, min_rate=MIN_REQUESTS_PER_SECOND,
+                 max_rate=MAX_REQUESTS_PER_SECOND, burst=RATE_BURST, increase=RATE_INCREASE,
+                 decrease_factor=RATE_DECREASE_FACTOR, slow_seconds=SLOW_RESPONSE_SECONDS, cooldown=1.0):
+        self.enabled = requests_per_second > 0
+        self.initial_rate = requests_per_second
+        self.min_rate = min(min_rate, requests_per_second)
+        self.max_rate = max(max_rate, requests_per_second)
+        self.burst = max(1, burst)
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self.queue_depth = 0  # Requests currently waiting for a token
+        self.throttled = 0  # Responses that triggered a slowdown
+        self._buckets = {}  # host -> _Bucket
+        self._lock = threading.Lock()
+
+    def _bucket(self, url):
+        host = urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.initial_rate, self.burst)
+        return bucket
+
+    def wait(self, url, deadline=None):
+        """Block until a request to the url's host is allowed.
+
+        Raises BudgetExceededError instead of waiting past the monotonic
+        deadline, which defaults to the end of the current lookup's budget.
+        """
+        if not self.enabled:
+            return
+        if deadline is None:
+            deadline = current_budget().deadline
+        with self._lock:
+            bucket = self._bucket(url)
+            now = time.monotonic()
+            bucket.refill(now)
+            bucket.tokens -= 1
+            delay = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0
+            if now + delay > deadline:
+                bucket.tokens += 1  # Hand the slot back to the requests queued behind
+                raise BudgetExceededError("Rate limit wait would outlast the lookup budget")
+            if delay:
+                self.queue_depth += 1
+        record('rate_wait', delay)
+        if delay:
+            try:
+                time.sleep(delay)
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+
+    def record(self, url, status=None, latency=None, error=False):
+        """Feed back the outcome of a request: its HTTP status, seconds taken, or that it failed outright."""
+        if not self.enabled:
+            return
+        congested = error or status == 429 or (status is not None and status >= 500) or (
+            latency is not None and latency > self.slow_seconds)
+        with self._lock:
+            bucket = self._bucket(url)
+            now = time.monotonic()
+            bucket.refill(now)
+            if congested:
+                if now - bucket.last_decrease >= self.cooldown:
+                    bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+                    bucket.last_decrease = now
+                    self.throttled += 1
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def stats(self):
+        """Current requests/second per host, requests waiting for a token and slowdowns so far."""
+        with self._lock:
+            rates = {host: bucket.rate for host, bucket in self._buckets.items()}
+            return {'rates': rates, 'queue_depth': self.queue_depth, 'throttled': self.throttled}
+
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    """Rate limiter shared by every lookup in this process."""
+    return AdaptiveRateLimiter()
+
+@lru_cache(maxsize=None)
+def get_http_session():
+    """Pooled HTTP session so API and fallback lookups reuse connections to CeX."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max(LOOKUP_WORKERS, FALLBACK_CONCURRENCY, 10))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'application/json'
+    })
+    return session
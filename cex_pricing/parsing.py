@@ -0,0 +1,228 @@
+"""HTML parsing and extraction of product cards from CeX search pages."""
+
+import json
+import re
+import time
+from collections import namedtuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .config import EMBEDDED_MAX_BYTES
+
+# Use lxml for HTML parsing when it is installed - it builds the tree much faster than html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Elements whose class marks them as (part of) the search results; everything
+# outside them is skipped by the tokenizer instead of being built into the tree
+RESULTS_REGION = SoupStrainer(class_=re.compile(r'result|product'))
+
+# Callables receiving (scope, seconds, page_bytes) after every parse, for timing
+parse_timing_hooks = []
+
+def parse_html(markup, scope='page', parse_only=None):
+    """Parse markup with the fastest available backend and report how long it took."""
+    started = time.perf_counter()
+    soup = BeautifulSoup(markup, HTML_PARSER, parse_only=parse_only)
+    elapsed = time.perf_counter() - started
+    for hook in parse_timing_hooks:
+        hook(scope, elapsed, len(markup))
+    return soup
+
+# One search result: title, cleaned price string and absolute product URL
+ProductCard = namedtuple('ProductCard', ['title', 'price', 'url'])
+
+PRICE_TAG, PRICE_CLASS = 'p', 'product-main-price'
+MAX_PRICE_LEVELS = 5  # Ancestors of a product link searched for its price
+
+def _absolute_url(href):
+    return "https://uk.webuy.com" + href if href.startswith('/') else href
+
+def extract_product_cards(soup, product_links):
+    """Pair each product link with the price in its card, in a single pass.
+
+    Every price element registers itself with all of its ancestors (the first
+    price in document order wins, as with select_one), so finding a link's
+    price is a dictionary lookup per ancestor rather than a CSS search of each
+    ancestor's subtree.
+    """
+    price_in = {}  # id(container) -> text of the first price element inside it
+    for price_elem in soup.descendants:
+        # Plain attribute checks - much cheaper than CSS/find_all matching per node
+        if price_elem.name != PRICE_TAG or PRICE_CLASS not in (price_elem.get('class') or ()):
+            continue
+        price_text = price_elem.get_text(strip=True)
+        for ancestor in price_elem.parents:
+            if ancestor.parent is None or id(ancestor) in price_in:
+                break  # The document root is no card; everything above already holds an earlier price
+            price_in[id(ancestor)] = price_text
+    
+    cards = []
+    for link in product_links:
+        # Get product title, skipping very short ones (e.g. image-only links)
+        title = link.get_text(strip=True)
+        href = link.get('href')
+        if not title or len(title) < 3 or not href:
+            continue
+        
+        # Price should be in the same card - the nearest ancestor holding one
+        container = link.parent
+        level = 0
+        # Stop at <body> or, in a tree parsed with only the results region, the document root
+        while container.parent is not None and container.name != 'body' and level < MAX_PRICE_LEVELS:
+            price_text = price_in.get(id(container))
+            if price_text is not None:
+                # Clean the price text
+                cards.append(ProductCard(title, re.sub(r'[^\d.]', '', price_text), _absolute_url(href)))
+                break
+            container = container.parent
+            level += 1
+    return cards
+
+# Bot-protection interstitials (Cloudflare, Incapsula, PerimeterX) served instead of a search page
+_BLOCKED_PAGE = re.compile(
+    r'<title>\s*(?:just a moment|access denied|attention required)|cf-chl-|/cdn-cgi/challenge-platform|'
+    r'_incapsula_resource|px-captcha', re.I
+)
+BLOCKED_SCAN_BYTES = 20_000  # Challenge pages are small, and say so near the top
+
+def looks_blocked(markup):
+    """Whether a page is a bot challenge or access-denied page rather than CeX's."""
+    return bool(markup) and _BLOCKED_PAGE.search(markup, 0, BLOCKED_SCAN_BYTES) is not None
+
+# Embedded page state. Nuxt 3 serialises it into <script id="__NUXT_DATA__" type="application/json">,
+# Nuxt 2 assigns it to window.__NUXT__; other scripts are only tried when neither has results
+_SCRIPT_OPEN = re.compile(r'<script\b([^>]*)>', re.I)
+_STATE_SCRIPT = re.compile(r'__NUXT_DATA__|application/(?:ld\+)?json', re.I)
+_STATE_ASSIGNMENT = re.compile(r'window\.__(?:NUXT|INITIAL_STATE)__\s*=\s*')
+_DATA_HINT = re.compile(r'product|items|results', re.I)
+MAX_STATE_NODES = 200_000  # Values visited in one blob before giving up on it
+_DEVALUE_WRAPPERS = {'Reactive', 'ShallowReactive', 'Ref', 'ShallowRef'}
+
+def extract_embedded_cards(markup, max_bytes=EMBEDDED_MAX_BYTES):
+    """Product cards from the JSON state a search page embeds in its scripts.
+
+    Works on the raw markup, without building a tree: known state blobs are
+    tried first, then any script mentioning products, and scanning stops at
+    the first blob that yields cards. Blobs over `max_bytes` are skipped.
+    """
+    state, other = [], []
+    for attrs, start, end in _inline_scripts(markup):
+        if end - start > max_bytes or end - start < 100:
+            continue
+        body = markup[start:end]
+        if _STATE_SCRIPT.search(attrs) or _STATE_ASSIGNMENT.search(body):
+            state.append((attrs, body))
+        elif _DATA_HINT.search(body):
+            other.append((attrs, body))
+    for attrs, body in state + other:
+        data = _load_state(attrs, body)
+        if data is None:
+            continue
+        cards = [card for records in _record_lists(data) for card in map(_record_card, records) if card]
+        if cards:
+            return cards
+    return []
+
+def _inline_scripts(markup):
+    """(attributes, body start, body end) of each script element.
+
+    Script ends are found with plain string searches - a lazy regex across a
+    megabyte-sized bundle is many times slower.
+    """
+    position = 0
+    while True:
+        tag = _SCRIPT_OPEN.search(markup, position)
+        if tag is None:
+            return
+        end = markup.find('</script', tag.end())
+        if end == -1:
+            end = markup.find('</SCRIPT', tag.end())
+        if end == -1:
+            return
+        yield tag.group(1), tag.end(), end
+        position = end
+
+def _load_state(attrs, body):
+    """The JSON value in a script body, or None if it doesn't hold one."""
+    assignment = _STATE_ASSIGNMENT.search(body)
+    if assignment:
+        start = assignment.end()
+    elif _STATE_SCRIPT.search(attrs):
+        start = len(body) - len(body.lstrip())
+    else:
+        start = body.find('{')
+    if start == -1:
+        return None
+    try:
+        # raw_decode stops at the end of the value, so trailing script is ignored
+        data, _ = json.JSONDecoder().raw_decode(body, start)
+    except ValueError:
+        return None
+    if '__NUXT_DATA__' in attrs and isinstance(data, list):
+        return _hydrate_devalue(data)
+    return data
+
+def _hydrate_devalue(values):
+    """Rebuild a Nuxt 3 payload, where containers refer to other entries of a flat list by index."""
+    resolved = {}
+    budget = [MAX_STATE_NODES]
+
+    def hydrate(index):
+        if type(index) is not int or not 0 <= index < len(values) or budget[0] <= 0:
+            return None  # Negative indices encode undefined/NaN/Infinity
+        if index in resolved:
+            return resolved[index]
+        budget[0] -= 1
+        value = values[index]
+        if isinstance(value, dict):
+            result = resolved[index] = {}
+            for key, item in value.items():
+                result[key] = hydrate(item)
+        elif isinstance(value, list) and value and isinstance(value[0], str):
+            # Typed value such as ["Reactive", 3]; only the wrappers around plain data matter here
+            resolved[index] = None
+            result = resolved[index] = hydrate(value[1]) if value[0] in _DEVALUE_WRAPPERS and len(value) > 1 else None
+        elif isinstance(value, list):
+            result = resolved[index] = []
+            result.extend(hydrate(item) for item in value)
+        else:
+            result = resolved[index] = value
+        return result
+
+    return hydrate(0)
+
+def _record_lists(data):
+    """Lists of objects with a price field anywhere in the state, visiting at most MAX_STATE_NODES values."""
+    found = []
+    stack = [data]
+    seen = set()  # Hydrated payloads can refer back to themselves
+    while stack and len(seen) < MAX_STATE_NODES:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, dict):
+            stack.extend(item for item in reversed(list(value.values())) if isinstance(item, (dict, list)))
+        elif isinstance(value, list) and value:
+            if isinstance(value[0], dict) and any('price' in key.lower() for key in value[0]):
+                found.append(value)
+            else:
+                stack.extend(item for item in reversed(value) if isinstance(item, (dict, list)))
+    return found
+
+def _record_card(record):
+    """ProductCard for one embedded result, or None if it lacks a title, URL or price."""
+    if not isinstance(record, dict):
+        return None
+    title = record.get('title') or record.get('name') or record.get('boxName') or ''
+    url = record.get('url') or record.get('href') or ''
+    if not url and record.get('boxId'):
+        url = f"/product-detail?id={record['boxId']}"
+    price = record.get('price') or record.get('sellPrice') or record.get('weSellFor')
+    if not (title and url and price) or not isinstance(title, str) or not isinstance(url, str):
+        return None
+    return ProductCard(title, re.sub(r'[^\d.]', '', str(price)), _absolute_url(url))
@@ -0,0 +1,93 @@
+"""Lookup results: what a lookup found and how it ended.
+
+A LookupResult unpacks like the (match, price, url) tuples lookups have always
+returned, and also carries the lookup's status, match score, the strategy
+that answered it, its latency and the price as a number:
+
+    result = fetch_cex_price("iPhone 14 128GB")
+    match, price, url = result
+    result.status, result.score, result.strategy, result.value
+"""
+
+MATCHED = 'matched'
+NO_MATCH = 'no_match'  # Results came back but none was similar enough
+NO_RESULTS = 'no_results'  # The search found nothing
+BUDGET_EXCEEDED = 'budget_exceeded'  # Ran out of time before finding anything
+BLOCKED = 'blocked'  # CeX refused or challenged the request
+ERROR = 'error'  # A request, the browser or parsing failed
+UNVERIFIED = 'unverified'  # A price was seen on the page but not matched to a product (HTTP fallback)
+# Failures that say nothing about the product: never cached, and looked up again
+RETRYABLE_STATUSES = frozenset({BUDGET_EXCEEDED, BLOCKED, ERROR})
+
+
+class LookupResult:
+    """The outcome of one lookup, iterable and indexable as (match, price, url)."""
+
+    __slots__ = ('match', 'price', 'url', 'status', 'score', 'strategy', 'reason', 'latency', 'value')
+
+    def __init__(self, match=None, price=None, url=None, status=None, score=None, strategy=None, reason=None,
+                 latency=None):
+        self.match = match
+        self.price = price  # As CeX shows it, e.g. '399.00'
+        self.url = url
+        self.status = status or (MATCHED if match is not None else NO_MATCH)
+        self.score = score  # Similarity of the match (or of the best candidate that missed)
+        self.strategy = strategy  # What answered: 'api', 'strategy_a', 'cache', 'catalogue'...
+        self.reason = reason  # Why a failed lookup failed, e.g. 'api_http_429' or 'ready_timeout'
+        self.latency = latency  # Seconds the lookup took
+        self.value = price_value(price)
+
+    @classmethod
+    def failed(cls, status, reason=None, **fields):
+        """A lookup that found nothing, with why."""
+        return cls(status=status, reason=reason, **fields)
+
+    @property
+    def retryable(self):
+        return self.status in RETRYABLE_STATUSES
+
+    def __iter__(self):
+        return iter((self.match, self.price, self.url))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.match, self.price, self.url)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (LookupResult, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"LookupResult({self.match!r}, {self.price!r}, {self.url!r}, status={self.status!r}, "
+                f"score={self.score!r}, strategy={self.strategy!r})")
+
+    def as_dict(self):
+        """Every field, e.g. for a JSON trace."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def price_value(price):
+    """A price string such as '399.00' as a float, or None."""
+    if price is None:
+        return None
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return None
+
+def as_result(result, **fields):
+    """A LookupResult for a result that may still be a plain (match, price, url) tuple."""
+    if isinstance(result, LookupResult):
+        return result
+    return LookupResult(*result, **fields)
+
+def lookup_status(result):
+    """'matched', 'no_match', or the status of a lookup that didn't get that far."""
+    status = getattr(result, 'status', None)
+    if status:
+        return status
+    return MATCHED if result[0] is not None else NO_MATCH
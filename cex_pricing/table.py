@@ -0,0 +1,169 @@
+"""Priced rows held column by column, for summaries and exports of large result sets.
+
+Prices are kept as a float column from the moment a row is priced, so the
+summary, price distribution and per-category breakdown are vectorized
+pandas/NumPy operations over typed columns, and every export (CSV, Parquet,
+Arrow) is written from the same DataFrame:
+
+    table = ResultTable(columns)
+    table.append(row, result)
+    frame = table.to_frame()
+    summarize(frame, category_column="Category")
+    export_results(frame, 'parquet')
+"""
+
+import importlib.util
+import io
+import time
+from array import array
+from itertools import compress
+
+import numpy as np
+import pandas as pd
+
+from .batch import RESULT_COLUMNS
+from .results import MATCHED, as_result
+
+MATCH_COLUMN, PRICE_COLUMN, URL_COLUMN, STATUS_COLUMN, SCRAPED_COLUMN = RESULT_COLUMNS
+CATEGORY_COLUMN_NAMES = ('category', 'product category', 'type', 'department')  # Guessed from the upload
+PRICE_PERCENTILES = [25, 50, 75, 90]
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+# Parquet and Arrow exports need pyarrow, which pandas imports only when they are written
+ARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+CSV_OPTIONS = {'index': False, 'float_format': '%.2f', 'date_format': '%Y-%m-%d %H:%M:%S'}
+# Ends each record while both CSVs are cut from one serialization; a quoted field can hold a
+# newline but not an ASCII record separator followed by one
+_RECORD_END = '\x1e\n'
+
+
+class ResultTable:
+    """Input rows and their lookup results, appended one at a time and stored as columns.
+
+    Result columns are typed as they arrive: prices as float64 (NaN without
+    one), scrape times as whole seconds. Columns are in the same order as
+    ResultCsvWriter's, and an input column that shares a name with a result
+    column is replaced by it.
+    """
+
+    def __init__(self, input_columns):
+        self.columns = list(input_columns) + [c for c in RESULT_COLUMNS if c not in input_columns]
+        self._inputs = {column: [] for column in self.columns if column not in RESULT_COLUMNS}
+        self._match = []
+        self._price = array('d')
+        self._url = []
+        self._status = []
+        self._scraped = array('q')  # Unix seconds
+
+    def __len__(self):
+        return len(self._status)
+
+    def append(self, row, result):
+        result = as_result(result)
+        for column, values in self._inputs.items():
+            values.append(row.get(column))
+        self._match.append(result.match)
+        self._price.append(np.nan if result.value is None else result.value)
+        self._url.append(result.url)
+        self._status.append(result.status)
+        self._scraped.append(int(time.time()))
+
+    def to_frame(self, start=0):
+        """The rows from `start` on as a DataFrame."""
+        data = {column: values[start:] for column, values in self._inputs.items()}
+        data[MATCH_COLUMN] = self._match[start:]
+        data[PRICE_COLUMN] = np.array(self._price[start:], dtype=np.float64)
+        data[URL_COLUMN] = self._url[start:]
+        data[STATUS_COLUMN] = pd.Categorical(self._status[start:])
+        data[SCRAPED_COLUMN] = np.array(self._scraped[start:], dtype='datetime64[s]')
+        return pd.DataFrame({column: data[column] for column in self.columns})
+
+def _matched(frame):
+    """Boolean array marking the rows that found a match."""
+    return (frame[STATUS_COLUMN] == MATCHED).to_numpy()
+
+def price_distribution(prices):
+    """Count, total, mean, spread and percentiles of an array of prices (NaNs ignored)."""
+    prices = prices[~np.isnan(prices)]
+    if not len(prices):
+        return {'count': 0, 'total': 0.0}
+    percentiles = np.percentile(prices, PRICE_PERCENTILES)
+    stats = {
+        'count': int(len(prices)),
+        'total': float(prices.sum()),
+        'mean': float(prices.mean()),
+        'std': float(prices.std()),
+        'min': float(prices.min()),
+        'max': float(prices.max())
+    }
+    stats.update({f'p{p}': float(value) for p, value in zip(PRICE_PERCENTILES, percentiles)})
+    return stats
+
+def category_breakdown(frame, category_column):
+    """Rows, matches, match rate, total and median price per value of `category_column`, biggest total first."""
+    matched = _matched(frame)
+    matched_prices = np.where(matched, frame[PRICE_COLUMN].to_numpy(), np.nan)
+    categories = frame[category_column].astype(object).fillna('(none)').replace('', '(none)')
+    grouped = pd.DataFrame({'matched': matched, 'value': matched_prices}).groupby(categories.to_numpy(), sort=False)
+    breakdown = grouped.agg(
+        rows=('matched', 'size'),
+        matched=('matched', 'sum'),
+        total_value=('value', 'sum'),
+        median_price=('value', 'median')
+    )
+    breakdown['match_rate'] = breakdown['matched'] / breakdown['rows']
+    breakdown.index.name = category_column
+    return breakdown.sort_values('total_value', ascending=False).reset_index()
+
+def guess_category_column(columns):
+    """The upload's category-like column (e.g. "Category"), if it has one."""
+    for column in columns:
+        if str(column).strip().lower() in CATEGORY_COLUMN_NAMES:
+            return column
+    return None
+
+def summarize(frame, category_column=None):
+    """Row and match counts, match rate, total value, status counts and the matched price distribution.
+
+    With a category column, 'categories' holds category_breakdown() of it.
+    """
+    rows = len(frame)
+    matched = _matched(frame)
+    prices = price_distribution(frame[PRICE_COLUMN].to_numpy()[matched])
+    summary = {
+        'rows': rows,
+        'matched': int(matched.sum()),
+        'match_rate': float(matched.mean()) if rows else 0.0,
+        'total_value': prices['total'],
+        'statuses': {str(status): int(count) for status, count in frame[STATUS_COLUMN].value_counts().items() if count},
+        'prices': prices
+    }
+    if category_column is not None:
+        summary['categories'] = category_breakdown(frame, category_column)
+    return summary
+
+def export_results(frame, fmt='csv'):
+    """The results as bytes in `fmt` ('csv', 'parquet' or Arrow IPC 'arrow').
+
+    Parquet and Arrow keep the column types (prices as float64, status as a
+    dictionary column, scrape times as timestamps) for downstream tools, and
+    need pyarrow (installed with Streamlit; see ARROW_AVAILABLE).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == 'csv':
+        return frame.to_csv(**CSV_OPTIONS).encode('utf-8')
+    buffer = io.BytesIO()
+    if fmt == 'parquet':
+        frame.to_parquet(buffer, index=False)
+    else:
+        frame.to_feather(buffer)
+    return buffer.getvalue()
+
+def export_csvs(frame):
+    """(complete, matches-only) CSV bytes, with each row serialised once for both."""
+    records = frame.to_csv(lineterminator=_RECORD_END, **CSV_OPTIONS).split(_RECORD_END)
+    header, rows = records[0], records[1:-1]
+    matched = _matched(frame)
+    full = '\n'.join(records)
+    matches = '\n'.join([header, *compress(rows, matched), ''])
+    return full.encode('utf-8'), matches.encode('utf-8')
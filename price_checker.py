@@ -1,21 +1,86 @@
 import streamlit as st
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timezone
-import difflib
-import time
-import re
+from datetime import datetime
+from functools import partial
+import io
 
-# Try to import Selenium, fallback gracefully if not available
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.chrome.options import Options
-    from webdriver_manager.chrome import ChromeDriverManager
-    SELENIUM_AVAILABLE = True
-except ImportError as e:
-    st.error(f"⚠️ Selenium import failed: {e}")
+from cex_pricing import (
+    ARROW_AVAILABLE,
+    SELENIUM_AVAILABLE,
+    SELENIUM_IMPORT_ERROR,
+    JobCheckpoint,
+    JobQueue,
+    category_breakdown,
+    get_catalogue,
+    get_metrics,
+    get_rate_limiter,
+    guess_category_column,
+    job_id_for
+)
+
+# Large uploads are streamed: read in chunks, results shown and written as they arrive
+CSV_CHUNK_ROWS = 1000
+PREVIEW_INTERVAL_SECONDS = 1.0
+
+@st.cache_resource
+def job_queue():
+    """Background pricing jobs shared by every session, with one bounded pool of lookup threads."""
+    return JobQueue()
+
+def csv_rows(data):
+    """Rows of an uploaded CSV, read in chunks on the job's thread rather than all at once."""
+    for chunk in pd.read_csv(io.BytesIO(data), chunksize=CSV_CHUNK_ROWS, dtype=str, keep_default_na=False):
+        yield from chunk.to_dict('records')
+
+def submit_job(queue, job_id, data, columns):
+    """Queue an upload for pricing, resuming from its checkpoint if an earlier run was interrupted."""
+    # Rough row count for the progress bar (quoted newlines make it approximate)
+    expected_rows = max(1, data.count(b'\n') - 1)
+    return queue.submit(job_id, csv_rows(data), columns, expected_rows=expected_rows,
+                        checkpoint=JobCheckpoint(job_id))
+
+def describe_eta(seconds):
+    """Rough time left, e.g. "about 3 min left"."""
+    if seconds is None:
+        return ""
+    if seconds < 60:
+        return f" · about {seconds:.0f}s left"
+    return f" · about {seconds / 60:.0f} min left"
+
+def describe_rate(limiter):
+    """Short status suffix with the adaptive request rate and how many requests are waiting on it."""
+    if not limiter['rates']:
+        return ""
+    return f" · {min(limiter['rates'].values()):.1f} requests/s, {limiter['queue_depth']} waiting"
+
+@st.fragment(run_every=PREVIEW_INTERVAL_SECONDS)
+def show_job_progress():
+    """Poll this session's background job, redrawing only this part of the page until it finishes."""
+    queue = job_queue()
+    job = queue.get(st.session_state.get("job_id"))
+    if job is None:
+        return
+    if not job.active:
+        st.rerun()  # Show the finished results with the whole page
+    progress = job.progress()
+    if job.status == "queued":
+        ahead = queue.position(job.job_id)
+        st.info(f"⏳ Waiting to start - {ahead} other upload(s) queued ahead of this one" if ahead
+                else "⏳ Waiting for a free worker to start this upload")
+        return
+    st.progress(min(progress["priced"] / max(1, progress["expected"]), 1.0))
+    recent_rows = job.recent_rows()
+    name = recent_rows[-1]["Product Name"] if recent_rows else "starting..."
+    st.text(f"Processing {progress['priced']}/{progress['expected']}: {name}"
+            f"{describe_eta(progress['eta_seconds'])}{describe_rate(get_rate_limiter().stats())}")
+    if recent_rows:
+        st.dataframe(pd.DataFrame(recent_rows), width='stretch')
+    st.caption("Pricing runs in the background - you can keep using the page, or come back to it later.")
+
+st.set_page_config(page_title="CeX Price Checker", page_icon="💷", layout="centered")
+
+if not SELENIUM_AVAILABLE:
+    st.error(f"⚠️ Selenium import failed: {SELENIUM_IMPORT_ERROR}")
     st.info("""
     **Deployment Issue Detected:** 
     
@@ -25,9 +90,6 @@ except ImportError as e:
     3. Try redeploying the app
     4. The app will use fallback mode with limited functionality
     """)
-    SELENIUM_AVAILABLE = False
-
-st.set_page_config(page_title="CeX Price Checker", page_icon="💷", layout="centered")
 
 # Version 2.2 - Clean user interface with simple progress
 st.title("💷 CeX Sell Price Checker")
@@ -115,468 +177,202 @@ uploaded_file = st.file_uploader(
     help="Your CSV should have a 'Product Name' column with the products you want to price check."
 )
 
-@st.cache_data(ttl=300)  # Cache results for 5 minutes
-def fetch_cex_price(product_name):
-    """Search CeX and return the best matched product and its sell price."""
-    if not product_name or not product_name.strip():
-        return None, None, None
-    
-    # Try Selenium first if available, fallback to requests method
-    if SELENIUM_AVAILABLE:
-        return fetch_cex_price_selenium(product_name)
-    else:
-        return fetch_cex_price_fallback(product_name)
+if uploaded_file:
+    data = uploaded_file.getvalue()
+    columns = list(pd.read_csv(io.BytesIO(data), nrows=0, dtype=str).columns) if data.strip() else []
 
-def fetch_cex_price_selenium(product_name):
-    """Search CeX using Selenium (preferred method)."""
-    if not product_name or not product_name.strip():
-        return None, None, None
-    
-    driver = None
-    try:
-        # Setup Chrome options for headless browsing (Streamlit Cloud compatible)
-        chrome_options = Options()
-        chrome_options.add_argument('--headless=new')  # Use new headless mode
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--disable-software-rasterizer')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--disable-web-security')
-        chrome_options.add_argument('--disable-features=VizDisplayCompositor')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--disable-plugins')
-        chrome_options.add_argument('--disable-images')  # Speed up loading
-        chrome_options.add_argument('--disable-background-timer-throttling')
-        chrome_options.add_argument('--disable-backgrounding-occluded-windows')
-        chrome_options.add_argument('--disable-renderer-backgrounding')
-        chrome_options.add_argument('--disable-background-networking')
-        chrome_options.add_argument('--remote-debugging-port=9222')
-        chrome_options.add_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        # Configure browser binaries for Streamlit Cloud
-        import os
-        
-        # Debug: Show available binaries
-        available_binaries = []
-        possible_paths = [
-            '/usr/bin/chromium', '/usr/bin/chromium-browser',
-            '/usr/bin/google-chrome', '/usr/bin/google-chrome-stable',
-            '/usr/bin/firefox', '/usr/bin/firefox-esr'
-        ]
-        for path in possible_paths:
-            if os.path.exists(path):
-                available_binaries.append(path)
+    if "Product Name" not in columns:
+        st.error("CSV must contain a 'Product Name' column.")
+    else:
+        # Each upload is a job, priced in the background so reruns (any widget click) never restart it.
+        # Rows are checkpointed as they finish, so a crash or restart resumes where it stopped
+        job_id = job_id_for(data)
+        queue = job_queue()
+        job = queue.get(job_id) or submit_job(queue, job_id, data, columns)
+        st.session_state["job_id"] = job_id
         
-        # Browser detection (silent)
+        if job.active and job.checkpoint.resumed:
+            resume_col, restart_col = st.columns([3, 1])
+            with resume_col:
+                st.info(f"♻️ Resuming job `{job_id}`: {job.checkpoint.resumed} rows already priced")
+            with restart_col:
+                if st.button("Start over", help="Discard the saved rows and price the whole file again"):
+                    with st.spinner("Stopping the current run..."):
+                        queue.cancel(job_id)
+                        stopped = job.wait(timeout=60)
+                    if stopped:
+                        job.checkpoint.clear()
+                        job = submit_job(queue, job_id, data, columns)
+                    else:
+                        # Its current row is still being looked up and would be saved into a cleared checkpoint
+                        st.warning("⏳ The current run is still stopping - try again in a moment.")
         
-        # Try Chrome first with explicit binary paths
-        try:
-            # Set Chrome binary location explicitly
-            chrome_binary_paths = [
-                '/usr/bin/chromium',
-                '/usr/bin/chromium-browser',
-                '/usr/bin/google-chrome',
-                '/usr/bin/google-chrome-stable'
-            ]
-            
-            chrome_binary = None
-            for path in chrome_binary_paths:
-                if os.path.exists(path):
-                    chrome_binary = path
-                    break
-            
-            if chrome_binary:
-                chrome_options.binary_location = chrome_binary
-                # Use ChromeDriverManager with automatic browser version detection
-                try:
-                    # Force fresh ChromeDriver download that matches Chrome version
-                    import shutil
-                    from pathlib import Path
-                    
-                    # Clear webdriver-manager cache for Chrome
-                    cache_dir = Path.home() / '.wdm' / 'drivers' / 'chromedriver'
-                    if cache_dir.exists():
-                        shutil.rmtree(cache_dir, ignore_errors=True)
-                    
-                    # Install ChromeDriver (compatible API)
-                    service = Service(ChromeDriverManager().install())
-                    driver = webdriver.Chrome(service=service, options=chrome_options)
-                    
-                except Exception as chrome_version_error:
-                    raise chrome_version_error
+        if job.active:
+            show_job_progress()
+        elif job.status in ("failed", "cancelled"):
+            progress = job.progress()
+            if job.status == "failed":
+                st.error(f"❌ Pricing stopped after {progress['priced']} rows: {progress['error']}")
             else:
-                raise Exception("No Chrome binary found")
-                
-        except Exception as chrome_error:
-            # Fallback to Firefox silently
-            try:
-                from selenium.webdriver.firefox.options import Options as FirefoxOptions
-                from webdriver_manager.firefox import GeckoDriverManager
-                
-                # Set Firefox binary location explicitly
-                firefox_binary_paths = [
-                    '/usr/bin/firefox',
-                    '/usr/bin/firefox-esr'
-                ]
-                
-                firefox_binary = None
-                for path in firefox_binary_paths:
-                    if os.path.exists(path):
-                        firefox_binary = path
-                        break
-                
-                if not firefox_binary:
-                    raise Exception("No Firefox binary found")
-                
-                firefox_options = FirefoxOptions()
-                firefox_options.add_argument('--headless')
-                firefox_options.add_argument('--no-sandbox')
-                firefox_options.add_argument('--disable-dev-shm-usage')
-                firefox_options.add_argument('--disable-gpu')
-                firefox_options.add_argument('--window-size=1920,1080')
-                firefox_options.add_argument('--disable-blink-features=AutomationControlled')
-                firefox_options.set_preference('general.useragent.override', 'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0')
-                firefox_options.set_preference('dom.webdriver.enabled', False)
-                firefox_options.binary_location = firefox_binary
-                
-                service = Service(GeckoDriverManager().install())
-                driver = webdriver.Firefox(service=service, options=firefox_options)
-                
-            except Exception as firefox_error:
-                st.error(f"Both Chrome and Firefox failed: {chrome_error}, {firefox_error}")
-                raise firefox_error
-        driver.set_page_load_timeout(15)  # Set timeout
-        
-        # Simplify search term for better matching
-        search_term = product_name.strip()
-        # Remove detailed descriptors for initial search
-        search_term = re.sub(r'\s*[,w]\/.*$', '', search_term)
-        
-        search_url = f"https://uk.webuy.com/search?stext={requests.utils.quote(search_term)}"
-        
-        try:
-            driver.get(search_url)
-            
-            # Wait for dynamic content with WebDriverWait
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            
-            # First wait for page load
-            wait = WebDriverWait(driver, 10)
-            
-            # Try different indicators that the page has loaded
-            indicators_to_try = [
-                (By.CSS_SELECTOR, 'a[href*="product"]'),
-                (By.CSS_SELECTOR, 'div[class*="product"]'),
-                (By.CSS_SELECTOR, 'div[class*="search"]'),
-                (By.CSS_SELECTOR, 'div[class*="result"]')
-            ]
-            
-            for locator in indicators_to_try:
-                try:
-                    element = wait.until(EC.presence_of_element_located(locator))
-                    break
-                except:
-                    continue
-            
-            # Get updated page source after JavaScript execution
-            time.sleep(2)  # Short final wait for any remaining updates
-            page_source = driver.page_source
-            
-        except Exception as nav_error:
-            page_source = driver.page_source
-        
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        # Silent page verification
-        
-        # Strategy A: Find product links and their associated prices
-        product_links = soup.select('a[href*="/product-detail"]')
-        
-        # Strategy B: Try to parse embedded JSON in script tags (Nuxt/Vue often embeds data)
-        if not product_links:
-            scripts = soup.find_all('script')
-            import json
-            for sc in scripts:
-                text = sc.get_text(strip=True)
-                if not text or len(text) < 100:
-                    continue
-                # Look for likely JSON blocks containing product data
-                if 'product' in text.lower() or 'items' in text.lower() or 'results' in text.lower():
-                    try:
-                        # Try to extract JSON object
-                        start = text.find('{')
-                        end = text.rfind('}')
-                        if start != -1 and end != -1 and end > start:
-                            obj = json.loads(text[start:end+1])
-                            # Heuristic: look for arrays that could be results
-                            candidates = []
-                            def walk(o):
-                                if isinstance(o, dict):
-                                    for k,v in o.items():
-                                        if isinstance(v, (list,dict)):
-                                            walk(v)
-                                elif isinstance(o, list):
-                                    # look for dict-like list with title/price/url fields
-                                    if len(o) > 0 and isinstance(o[0], dict) and any('price' in (k.lower()) for k in o[0].keys()):
-                                        candidates.append(o)
-                                    else:
-                                        for item in o:
-                                            walk(item)
-                            walk(obj)
-                            if candidates:
-                                # Convert to synthetic product_links-like structures
-                                product_links = []
-                                for arr in candidates:
-                                    for it in arr:
-                                        title = it.get('title') or it.get('name') or ''
-                                        url = it.get('url') or it.get('href') or ''
-                                        price = it.get('price') or it.get('sellPrice') or it.get('weSellFor')
-                                        if title and url:
-                                            # Create a minimal soup-like object wrapper
-                                            from bs4 import Tag
-                                            a = soup.new_tag('a', href=url)
-                                            a.string = title
-                                            # attach a nearby price wrapper we can find later
-                                            if price:
-                                                p = soup.new_tag('p', **{'class':'product-main-price'})
-                                                p.string = f"£{price}"
-                                                wrapper = soup.new_tag('div')
-                                                wrapper.append(a)
-                                                wrapper.append(p)
-                                                product_links.append(a)
-                                            else:
-                                                product_links.append(a)
-                                if product_links:
-                                    break
-                    except Exception:
-                        continue
-        
-        
-        # Try alternative link patterns if main pattern fails
-        if not product_links:
-            patterns_to_try = [
-                'a[href*="product"]',
-                'a[href*="buy"]', 
-                'a[href*="sell"]',
-                'a[href*="item"]',
-                'a[href*="detail"]',
-                'a[class*="product"]',
-                'a[class*="item"]'
-            ]
-            
-            for pattern in patterns_to_try:
-                alt_links = soup.select(pattern)
-                if alt_links:
-                    product_links = alt_links
-                    break
-        
-        if not product_links:
-            # Try clicking the first product card or category and re-parse
-            try:
-                from selenium.webdriver.common.by import By
-                cards = driver.find_elements(By.CSS_SELECTOR, 'a, div')
-                for el in cards[:50]:
-                    try:
-                        text = el.text.strip().lower()
-                        if any(k in text for k in ['results', 'iphone', 'product', 'category']):
-                            el.click()
-                            time.sleep(3)
-                            page_source = driver.page_source
-                            soup = BeautifulSoup(page_source, 'html.parser')
-                            product_links = soup.select('a[href*="/product-detail"]')
-                            if product_links:
-                                break
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-        
-        if not product_links:
-            return None, None, None
-        
-        best_match = None
-        best_price = None
-        best_url = None
-        highest_ratio = 0
-        
-        for link in product_links:
-            try:
-                # Get product title
-                title = link.get_text(strip=True)
-                if not title or len(title) < 3:  # Skip very short titles
-                    continue
-                    
-                # Get the full URL
-                href = link.get("href")
-                if not href:
-                    continue
-                url = "https://uk.webuy.com" + href if href.startswith('/') else href
-                
-                # Find the price - look for nearest price element
-                # Price should be in the same parent container
-                parent_container = link.parent
-                max_levels = 5  # Limit search levels
-                current_level = 0
-                
-                while parent_container and parent_container.name != 'body' and current_level < max_levels:
-                    price_elem = parent_container.select_one('p.product-main-price')
-                    if price_elem:
-                        price_text = price_elem.get_text(strip=True)
-                        # Clean the price text and validate
-                        price_clean = re.sub(r'[^\d.]', '', price_text)
-                        
-                        # Validate price format
-                        try:
-                            price_value = float(price_clean)
-                            if price_value > 0:
-                                # Similarity check to pick best match
-                                ratio = difflib.SequenceMatcher(None, product_name.lower(), title.lower()).ratio()
-                                if ratio > highest_ratio:
-                                    highest_ratio = ratio
-                                    best_match = title
-                                    best_price = price_clean
-                                    best_url = url
-                        except ValueError:
-                            pass  # Invalid price, skip
-                        break
-                    parent_container = parent_container.parent
-                    current_level += 1
-            except Exception as link_error:
-                # Log individual link errors but continue processing
-                continue
-                
-        # Only return results if we have a reasonable match (>= 30% similarity)
-        if highest_ratio >= 0.3:
-            return best_match, best_price, best_url
+                st.warning(f"⏹️ Pricing was stopped after {progress['priced']} rows.")
+            if st.button("🔁 Resume", help="Carry on from the rows already priced"):
+                submit_job(queue, job_id, data, columns)
+                st.rerun()
         else:
-            return None, None, None
-        
-    except Exception as e:
-        return None, None, None
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass  # Ignore cleanup errors
-
-def fetch_cex_price_fallback(product_name):
-    """Fallback method using requests when Selenium is not available."""
-    try:
-        
-        # Try simple requests approach (limited success due to JavaScript)
-        search_url = f"https://uk.webuy.com/search?stext={requests.utils.quote(product_name.strip())}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
+            progress = job.progress()
+            results = job.frame()
+            category_column = guess_category_column(job.columns)
+            summary = job.summary(category_column)
+            total_products = summary["rows"]
+            found_matches = summary["matched"]
+            st.success(f"✅ Processing complete! ({total_products} rows in {progress['elapsed']:.1f}s)")
             
-            # Look for any price patterns in the HTML
-            price_pattern = r'£[\d,]+(?:\.\d{2})?'
-            prices = re.findall(price_pattern, response.text)
+            # Show statistics
+            unique_lookups = progress["unique"]
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.metric("Total Products", total_products)
+            with col2:
+                st.metric("Unique Lookups", f"{unique_lookups}/{total_products}",
+                          help=f"{1 - unique_lookups/max(1, total_products):.0%} of rows were duplicates and reused another row's result")
+            with col3:
+                st.metric("Matches Found", f"{found_matches}/{total_products}")
+            with col4:
+                st.metric("Success Rate", f"{summary['match_rate']*100:.1f}%")
+            with col5:
+                st.metric("Total Value", f"£{summary['total_value']:.2f}")
             
-            if prices:
-                # Return a basic result indicating fallback mode
-                return f"Search results found (fallback mode)", prices[0].replace('£', ''), search_url
-            else:
-                return f"No prices found in fallback mode", None, search_url
-        else:
-            return None, None, None
+            if progress["out_of_time"]:
+                st.warning(
+                    f"⏱️ {progress['out_of_time']} rows ran out of time before CeX answered "
+                    f"(Lookup Status \"budget_exceeded\" in the results) - these were not saved as no-matches."
+                )
+                if st.button("🔁 Retry timed-out rows", help="Look up just the rows that ran out of time again"):
+                    submit_job(queue, job_id, data, columns)
+                    st.rerun()
             
-    except Exception as e:
-        return None, None, None
-
-
-if uploaded_file:
-    df = pd.read_csv(uploaded_file)
-
-    if "Product Name" not in df.columns:
-        st.error("CSV must contain a 'Product Name' column.")
-    else:
-        enriched = []
-        product_names = df["Product Name"].tolist()
-        
-        # Create progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+            stats = job.cache_stats
+            st.caption(
+                f"⚡ Price cache: {stats['cache_hits']} hits, "
+                f"{stats['cache_misses']} misses this run "
+                f"({stats['cache_entries']} products stored)"
+            )
+            catalogue = get_catalogue().stats()
+            if catalogue['products']:
+                st.caption(
+                    f"📚 Catalogue snapshot: {stats['catalogue_hits']} lookups answered locally "
+                    f"({catalogue['fresh_products']} fresh products from {catalogue['terms']} harvested searches)"
+                )
+            limiter = get_rate_limiter().stats()
+            if limiter['rates']:
+                st.caption(
+                    f"🚦 Request rate to CeX is now {min(limiter['rates'].values()):.1f}/s; "
+                    f"slowed down {limiter['throttled']} times so far in response to throttling or errors"
+                )
         
-        for i, name in enumerate(product_names):
-            # Update progress
-            progress = (i + 1) / len(product_names)
-            progress_bar.progress(progress)
-            status_text.text(f"Processing {i+1}/{len(product_names)}: {name}")
-            
-            match, price, url = fetch_cex_price(name)
-            enriched.append({
-                "Product Name": name,
-                "CeX Matched Product": match,
-                "CeX Sell Price (GBP)": price,
-                "CeX URL": url,
-                "Scraped At (UTC)": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-            })
+            # Where lookups spend their time, for tuning
+            with st.expander("⏱️ Performance Details"):
+                metrics = get_metrics()
+                stages = metrics.summary()
+                if stages:
+                    st.caption("Seconds per lookup stage since the app started (most recent samples)")
+                    st.dataframe(pd.DataFrame([
+                        {"Stage": stage, "Count": row["count"], "p50 (s)": row["p50"], "p95 (s)": row["p95"], "Max (s)": row["max"]}
+                        for stage, row in stages.items()
+                    ]).round(3), width='stretch', hide_index=True)
+                else:
+                    st.caption("No lookups have been timed yet - every product was answered from the cache.")
+                weight = metrics.page_weight_summary()
+                if weight:
+                    st.caption(
+                        f"🪶 Browser page weight: median {weight['page_bytes']['p50'] / 1024:.0f} KB over "
+                        f"{weight['page_requests']['p50']:.0f} requests (p95 {weight['page_bytes']['p95'] / 1024:.0f} KB, "
+                        f"{weight['page_requests']['p95']:.0f} requests)"
+                    )
+                failures = metrics.failure_counts()
+                if failures:
+                    st.markdown("**Lookups without a match, by reason**")
+                    st.dataframe(pd.DataFrame({"Reason": list(failures), "Lookups": list(failures.values())}),
+                                 width='stretch', hide_index=True)
+                st.download_button(
+                    label="🧾 Download Trace (JSON)",
+                    data=metrics.to_json(indent=2),
+                    file_name=f"cex_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime="application/json",
+                    help="Per-stage timing histograms, failure counts and traces of recent lookups"
+                )
         
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
+            st.markdown("### 📊 Results")
+            st.dataframe(results, width='stretch')
 
-        enriched_df = pd.DataFrame(enriched)
-        result = pd.concat([df, enriched_df.drop("Product Name", axis=1)], axis=1)
+            with st.expander("📈 Price Breakdown"):
+                prices = summary["prices"]
+                if prices["count"]:
+                    st.caption(f"Sell prices of the {prices['count']} matched rows (£)")
+                    st.dataframe(pd.DataFrame([{
+                        "Mean": prices["mean"], "Std Dev": prices["std"], "Min": prices["min"], "p25": prices["p25"],
+                        "Median": prices["p50"], "p75": prices["p75"], "p90": prices["p90"], "Max": prices["max"]
+                    }]).round(2), width='stretch', hide_index=True)
+                st.markdown("**Rows by lookup status**")
+                st.dataframe(pd.DataFrame({"Lookup Status": list(summary["statuses"]),
+                                           "Rows": list(summary["statuses"].values())}),
+                             width='stretch', hide_index=True)
+                group_columns = [c for c in job.columns if c != "Product Name"]
+                if group_columns:
+                    group_by = st.selectbox(
+                        "Break down by", group_columns,
+                        index=group_columns.index(category_column) if category_column in group_columns else 0
+                    )
+                    breakdown = summary["categories"] if group_by == category_column else category_breakdown(results, group_by)
+                    st.dataframe(breakdown.rename(columns={
+                        "rows": "Rows", "matched": "Matches", "total_value": "Total Value (£)",
+                        "median_price": "Median Price (£)", "match_rate": "Match Rate"
+                    }).round(2), width='stretch', hide_index=True)
 
-        # Calculate statistics
-        total_products = len(result)
-        found_matches = len([x for x in enriched if x['CeX Matched Product'] is not None])
-        total_value = sum([float(x['CeX Sell Price (GBP)']) for x in enriched if x['CeX Sell Price (GBP)'] is not None])
+            # Download enriched CSV - files are built when a button is clicked, not on every rerun
+            st.markdown("### 📥 Download Results")
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        st.success("✅ Processing complete!")
-        
-        # Show statistics
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Total Products", total_products)
-        with col2:
-            st.metric("Matches Found", f"{found_matches}/{total_products}")
-        with col3:
-            st.metric("Success Rate", f"{(found_matches/total_products)*100:.1f}%")
-        with col4:
-            st.metric("Total Value", f"£{total_value:.2f}")
-        
-        st.markdown("### 📊 Results")
-        st.dataframe(result, width='stretch')
-
-        # Download enriched CSV
-        st.markdown("### 📥 Download Results")
-        
-        csv_bytes = result.to_csv(index=False).encode("utf-8")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.download_button(
-                label="📥 Download Complete Results (CSV)",
-                data=csv_bytes,
-                file_name=f"cex_prices_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                help="Download your results with CeX pricing data"
-            )
-        
-        with col2:
-            # Create a filtered version with only successful matches
-            successful_results = result[result['CeX Matched Product'].notna()]
-            if len(successful_results) > 0:
-                successful_csv = successful_results.to_csv(index=False).encode("utf-8")
+            col1, col2 = st.columns(2)
+            with col1:
                 st.download_button(
-                    label="✨ Download Matches Only (CSV)",
-                    data=successful_csv,
-                    file_name=f"cex_matches_only_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    label="📥 Download Complete Results (CSV)",
+                    data=partial(job.export, "csv"),
+                    file_name=f"cex_prices_{stamp}.csv",
                     mime="text/csv",
-                    help="Download only products that had successful matches"
+                    help="Download your results with CeX pricing data"
                 )
+        
+            with col2:
+                # Only products that had successful matches
+                if found_matches > 0:
+                    st.download_button(
+                        label="✨ Download Matches Only (CSV)",
+                        data=partial(job.export, "csv", matches_only=True),
+                        file_name=f"cex_matches_only_{stamp}.csv",
+                        mime="text/csv",
+                        help="Download only products that had successful matches"
+                    )
+
+            # Typed exports for downstream tools (pandas, DuckDB, Power BI...), when pyarrow is installed
+            if ARROW_AVAILABLE:
+                col3, col4 = st.columns(2)
+                with col3:
+                    st.download_button(
+                        label="🗃️ Download Results (Parquet)",
+                        data=partial(job.export, "parquet"),
+                        file_name=f"cex_prices_{stamp}.parquet",
+                        mime="application/vnd.apache.parquet",
+                        help="Complete results with prices stored as numbers and scrape times as timestamps"
+                    )
+                with col4:
+                    st.download_button(
+                        label="🏹 Download Results (Arrow)",
+                        data=partial(job.export, "arrow"),
+                        file_name=f"cex_prices_{stamp}.arrow",
+                        mime="application/vnd.apache.arrow.file",
+                        help="Complete results as an Arrow IPC file, typed like the Parquet export"
+                    )
 
 # --- PayPal Donate Button ---
 st.markdown("---")